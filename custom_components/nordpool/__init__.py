@@ -1,20 +1,27 @@
+import asyncio
 import logging
 from collections import defaultdict
 from datetime import timedelta
 
 
-import backoff
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.const import Platform
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.event import async_track_time_change
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.util import dt as dt_utils
 
-from .aio_price import AioPrices, InvalidValueException
-from .events import async_track_time_change_in_tz
+from .aio_price import (
+    AioPrices,
+    InvalidValueException,
+    PARSE_EXECUTOR,
+    UPSTREAM_ERRORS,
+)
+from .cache import PriceCache
+from .misc import stockholm_tz
+from .scheduler import TomorrowPoller
 from .services import async_setup_services
 
 from .const import (
@@ -26,11 +33,9 @@ from .const import (
     EVENT_NEW_HOUR,
     EVENT_NEW_PRICE,
     _CURRENCY_LIST,
-    RANDOM_MINUTE,
-    RANDOM_SECOND,
+    MAX_CONCURRENT_FETCHES,
 )
 
-
 STARTUP = f"""
 -------------------------------------------------------------------
 {NAME}
@@ -56,46 +61,122 @@ class NordpoolData:
         self.currency = []
         self.listeners = []
         self.areas = []
+        # (currency, area) pairs the sensors asked for.
+        self._requested = set()
+        # Parsed responses per delivery date, shared by today and tomorrow
+        # as they overlap by two delivery dates.
+        self.cache = PriceCache()
+        self._spots = {}
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+        # Currencies waiting for the next batch, and all the currencies that
+        # are being loaded, with futures set to the errors of the batch that
+        # loads them. The task running the batches.
+        self._pending = {}
+        self._loading = {}
+        self._batch = None
+        # Set up with the integration, polls for tomorrows prices.
+        self.poller = None
+        # entity_id -> sensor, for the services that use a sensor's prices.
+        self.sensors = {}
+
+    def _spot(self, currency: str) -> AioPrices:
+        """Return the client for a currency, one is reused for every refresh."""
+        spot = self._spots.get(currency)
+        if spot is None:
+            client = async_get_clientsession(self._hass)
+            spot = AioPrices(currency, client, cache=self.cache)
+            self._spots[currency] = spot
+        return spot
+
+    @staticmethod
+    def _day_dt(type_: str):
+        """The datetime to fetch for today or tomorrow."""
+        if type_ == "tomorrow":
+            return dt_utils.now() + timedelta(hours=24)
+        return dt_utils.now()
+
+    async def _fetch(self, currency: str, type_: str, dt, areas) -> bool:
+        """Fetch a day for a currency, returns True if the prices changed.
+
+        Concurrent fetches of the same delivery dates share one request, see
+        PriceCache.inflight.
+        """
+        async with self._semaphore:
+            data = await self._spot(currency).hourly(end_date=dt, areas=areas)
+        if data and data["areas"] != self._data[currency].get(type_):
+            self._data[currency][type_] = data["areas"]
+            return True
+        return False
+
+    async def _refresh(self, days, currencies=None) -> tuple:
+        """Fetch the (type_, dt) days for the currencies concurrently.
+
+        Returns the first exception for each type_ that failed, and the
+        set of type_ where the prices changed.
+        """
+        if currencies is None:
+            currencies = self.currency
+        # A copy, areas added while fetching are fetched by the next batch.
+        areas = list(self.areas) if len(self.areas) > 0 else None
+
+        jobs = [(currency, type_, dt) for type_, dt in days for currency in currencies]
+        _LOGGER.debug("Refreshing %s", jobs)
+        results = await asyncio.gather(
+            *(self._fetch(currency, type_, dt, areas) for currency, type_, dt in jobs),
+            return_exceptions=True,
+        )
 
-    async def _update(self, type_="today", dt=None, areas=None):
+        errors = {}
+        changed = set()
+        for (_, type_, _), res in zip(jobs, results):
+            if isinstance(res, BaseException):
+                errors.setdefault(type_, res)
+            elif res:
+                changed.add(type_)
+        return errors, changed
+
+    async def _update(
+        self, type_="today", dt=None, areas=None, currencies=None
+    ) -> bool:
         _LOGGER.debug("calling _update %s %s %s", type_, dt, areas)
-        hass = self._hass
-        client = async_get_clientsession(hass)
 
         if dt is None:
-            dt = dt_utils.now()
+            dt = self._day_dt(type_)
 
         if areas is not None:
             self.areas += [area for area in areas if area not in self.areas]
-        # We dont really need today and morrow
-        # when the region is in another timezone
-        # as we request data for 3 days anyway.
-        # Keeping this for now, but this should be changed.
-        for currency in self.currency:
-            spot = AioPrices(currency, client)
-            data = await spot.hourly(
-                end_date=dt, areas=self.areas if len(self.areas) > 0 else None
-            )
-            if data:
-                self._data[currency][type_] = data["areas"]
 
-    async def update_today(self, areas=None):
-        """Update today's prices"""
+        errors, changed = await self._refresh([(type_, dt)], currencies)
+        if errors:
+            raise errors[type_]
+        return type_ in changed
+
+    async def update_today(self, areas=None, currencies=None) -> bool:
+        """Update today's prices, returns True if they changed."""
         _LOGGER.debug("Updating today's prices.")
-        if areas is not None:
-            self.areas += [area for area in areas if area not in self.areas]
-        await self._update("today", areas=self.areas if len(self.areas) > 0 else None)
+        return await self._update("today", areas=areas, currencies=currencies)
 
-    async def update_tomorrow(self, areas=None):
-        """Update tomorrows prices."""
+    async def update_tomorrow(self, areas=None, currencies=None) -> bool:
+        """Update tomorrows prices, returns True if they changed."""
         _LOGGER.debug("Updating tomorrows prices.")
-        if areas is not None:
-            self.areas += [area for area in areas if area not in self.areas]
-        await self._update(
-            type_="tomorrow",
-            dt=dt_utils.now() + timedelta(hours=24),
-            areas=self.areas if len(self.areas) > 0 else None,
-        )
+        return await self._update("tomorrow", areas=areas, currencies=currencies)
+
+    def missing_tomorrow(self) -> set:
+        """Areas that don't have all of tomorrow's prices in a currency they
+        were asked for in."""
+        missing = set()
+        for currency, area in self._requested:
+            tomorrow = self._data.get(currency, {}).get("tomorrow") or {}
+            values = tomorrow.get(area, {}).get("values")
+            # A local day is 23 to 25 hours long
+            if not values or values.end - values.start < 23 * 3600:
+                missing.add(area)
+        return missing
+
+    async def tomorrow_published(self, area: str) -> bool:
+        """Check if tomorrow's (CET) prices are published for an area."""
+        day = dt_utils.now().astimezone(stockholm_tz).date() + timedelta(days=1)
+        return await self._spot(self.currency[0]).published(day, area)
 
     async def _someday(self, area: str, currency: str, day: str):
         """Returns today's or tomorrow's prices in an area in the currency"""
@@ -105,27 +186,73 @@ class NordpoolData:
                 % (currency, ", ".join(_CURRENCY_LIST))
             )
 
-        if area not in self.areas:
-            self.areas.append(area)
-        # This is needed as the currency is
+        # This is needed as the currency and areas are
         # set in the sensor.
-        if currency not in self.currency:
-            self.currency.append(currency)
-            try:
-                await self.update_today(areas=self.areas)
-            except InvalidValueException:
-                _LOGGER.debug("No data available for today, retrying later")
+        errors = {}
+        if (currency, area) not in self._requested:
+            # Also for a known currency and area that weren't fetched together
+            self._requested.add((currency, area))
+            if area not in self.areas:
+                self.areas.append(area)
+            if currency not in self.currency:
+                self.currency.append(currency)
+            errors = await self._load(currency)
+        elif currency in self._loading:
+            # Wait for the batch that fetches it
+            errors = await asyncio.shield(self._loading[currency])
+
+        for type_, err in errors.items():
+            if isinstance(err, UPSTREAM_ERRORS):
+                _LOGGER.warning("Unable to fetch %s prices, %s", type_, err)
+            elif not isinstance(err, InvalidValueException):
+                raise err
+            else:
+                _LOGGER.debug("No data available for %s, retrying later", type_)
+
+        return self._data.get(currency, {}).get(day, {}).get(area)
+
+    async def _load(self, currency: str) -> dict:
+        """Fetch today and tomorrow for a new currency or area.
+
+        Sensors that are added at the same time share one batch, currencies
+        and areas that arrive while a batch is fetching are fetched in the
+        next one. Returns the first exception for each type_ that failed.
+        """
+        future = self._pending.get(currency)
+        if future is None:
+            future = self._hass.loop.create_future()
+            self._pending[currency] = self._loading[currency] = future
+        # The task can finish before create_task returns when it starts
+        # eagerly, so a finished task is the same as none.
+        if self._batch is None or self._batch.done():
+            self._batch = self._hass.async_create_task(self._run_batch())
+        return await asyncio.shield(future)
+
+    async def _run_batch(self) -> None:
+        """Fetch the pending currencies, until none are left."""
+        # Let the sensors added in the same iteration join the first batch,
+        # also when the task starts eagerly.
+        await asyncio.sleep(0)
+        while self._pending:
+            pending, self._pending = self._pending, {}
+            currencies = [c for c in self.currency if c in pending]
+            errors = {}
             try:
-                await self.update_tomorrow(areas=self.areas)
-            except InvalidValueException:
-                _LOGGER.debug("No data available for tomorrow, retrying later")
+                errors, _ = await self._refresh(
+                    [(type_, self._day_dt(type_)) for type_ in ("today", "tomorrow")],
+                    currencies,
+                )
+            finally:
+                for currency, future in pending.items():
+                    if self._loading.get(currency) is future:
+                        del self._loading[currency]
+                    if not future.done():
+                        future.set_result(errors)
 
             # Send a new data request after new data is updated for this first run
             # This way if the user has multiple sensors they will all update
             async_dispatcher_send(self._hass, EVENT_NEW_HOUR)
 
-        return self._data.get(currency, {}).get(day, {}).get(area)
-
     async def today(self, area: str, currency: str) -> dict:
         """Returns today's prices in an area in the requested currency"""
         return await self._someday(area, currency, "today")
@@ -147,13 +274,17 @@ async def _dry_setup(hass: HomeAssistant, config: ConfigType) -> bool:
             """Cb to handle some house keeping when it a new day."""
             _LOGGER.debug("Called new_day_cb callback")
 
+            missing = []
             for curr in api.currency:
                 if not api._data.get(curr, {}).get("tomorrow"):
-                    api._data[curr]["today"] = await api.update_today()
+                    missing.append(curr)
                 else:
                     api._data[curr]["today"] = api._data[curr]["tomorrow"]
                 api._data[curr]["tomorrow"] = {}
 
+            if missing:
+                await api.update_today(currencies=missing)
+
             async_dispatcher_send(hass, EVENT_NEW_DAY)
 
         async def new_period(_):
@@ -161,31 +292,18 @@ async def _dry_setup(hass: HomeAssistant, config: ConfigType) -> bool:
             _LOGGER.debug("Called new_period callback")
             async_dispatcher_send(hass, EVENT_NEW_HOUR)
 
-        @backoff.on_exception(
-            backoff.constant,
-            (InvalidValueException),
-            logger=_LOGGER,
-            interval=600,
-            max_time=7200,
-            jitter=None,
-        )
-        async def new_data_cb(_):
-            """Callback to fetch new data for tomorrows prices at 1300ish CET
-            and notify any sensors, about the new data
+        async def new_data_cb(changed):
+            """Callback from the poller when tomorrows prices are fetched,
+            notifies any sensors about the new data
             """
-            # _LOGGER.debug("Called new_data_cb")
-            await api.update_tomorrow()
-            async_dispatcher_send(hass, EVENT_NEW_PRICE)
+            if changed:
+                async_dispatcher_send(hass, EVENT_NEW_PRICE)
+            else:
+                _LOGGER.debug("Tomorrows prices are unchanged, not notifying sensors")
 
         # Handles futures updates
-        cb_update_tomorrow = async_track_time_change_in_tz(
-            hass,
-            new_data_cb,
-            hour=13,
-            minute=RANDOM_MINUTE,
-            second=RANDOM_SECOND,
-            tz=await dt_utils.async_get_time_zone("Europe/Stockholm"),
-        )
+        api.poller = TomorrowPoller(hass, api, new_data_cb)
+        api.poller.start()
 
         cb_new_day = async_track_time_change(
             hass, new_day_cb, hour=0, minute=0, second=0
@@ -197,7 +315,16 @@ async def _dry_setup(hass: HomeAssistant, config: ConfigType) -> bool:
             hass, new_period, minute=[0, 15, 30, 45], second=0
         )
 
-        api.listeners.append(cb_update_tomorrow)
+        async def stop_cb(_):
+            """Stop the parse executor when Home Assistant stops."""
+            # Already removed, unsubscribing again on unload would log an error.
+            api.listeners.remove(cb_stop)
+            PARSE_EXECUTOR.shutdown()
+
+        cb_stop = hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stop_cb)
+
+        api.listeners.append(cb_stop)
+        api.listeners.append(api.poller.stop)
         api.listeners.append(cb_new_period)
         api.listeners.append(cb_new_day)
 
@@ -230,6 +357,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             for unsub in hass.data[DOMAIN].listeners:
                 unsub()
         hass.data.pop(DOMAIN)
+        PARSE_EXECUTOR.shutdown()
 
         return True
 
@@ -1,22 +1,45 @@
 import asyncio
 import logging
-from collections import defaultdict
-from datetime import date, datetime, timedelta
+import math
+import random
+from array import array
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
 from datetime import timezone as ts
+from functools import lru_cache
+from heapq import heappop, heappush
+from itertools import count
+from time import monotonic
 
-# import aiohttp
-# import backoff
+import aiohttp
 from dateutil.parser import parse as parse_dt
 from homeassistant.util import dt as dt_utils
 
 # from nordpool.elspot import Prices
 from pytz import timezone, utc
 
-from .misc import add_junk
-from .const import tzs, INVALID_VALUES
+from .const import (
+    BREAKER_RESET_TIMEOUT,
+    BREAKER_THRESHOLD,
+    PRIORITY_REFRESH,
+    RATE_BURST,
+    RATE_LIMIT,
+    REQUEST_RETRIES,
+    REQUEST_TIMEOUT,
+    tzs,
+)
+from .series import PriceSeries
 
 _LOGGER = logging.getLogger(__name__)
 
+_STOCKHOLM = timezone("Europe/Stockholm")
+
+# Returned by AioPrices._io when a conditional request wasn't modified.
+NOT_MODIFIED = object()
+# Returned by AioPrices._fetch_or_stale when the last good data is served.
+STALE = object()
+
 
 class InvalidValueException(ValueError):
     pass
@@ -26,13 +49,50 @@ class CurrencyMismatch(ValueError):  # pylint: disable=missing-class-docstring
     pass
 
 
+class CircuitOpenException(Exception):
+    """Raised instead of requesting while the circuit breaker is open."""
+
+
+# Statuses that are worth retrying.
+TRANSIENT_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+# Errors from the API that the last good cached data is served for.
+UPSTREAM_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenException)
+
+
+# Zone objects per area, looked up once.
+_AREA_ZONES = {}
+
+
+async def _area_zone(area):
+    """The zone of an area, None if we don't know it."""
+    zone = _AREA_ZONES.get(area)
+    if zone is None and area in tzs:
+        zone = _AREA_ZONES[area] = await dt_utils.async_get_time_zone(tzs[area])
+    return zone
+
+
+@lru_cache(maxsize=128)
+def _utc_day_bounds(zone, local_day) -> tuple:
+    """Start and end of a local day in zone, as epoch seconds."""
+    start = datetime.combine(local_day, time(), tzinfo=zone)
+    end = datetime.combine(local_day + timedelta(days=1), time(), tzinfo=zone)
+    return start.timestamp(), end.timestamp()
+
+
+async def local_day_bounds(area, dt):
+    """Start and end of the local day of dt in area, as epoch seconds."""
+    zone = await _area_zone(area)
+    if zone is None:
+        return None
+    return _utc_day_bounds(zone, dt.astimezone(zone).date())
+
+
 async def join_result_for_correct_time(results, dt):
     """Parse a list of responses from the api
     to extract the correct hours in there timezone.
     """
-    # utc = datetime.utcnow()
     fin = defaultdict(dict)
-    # _LOGGER.debug("join_result_for_correct_time %s", dt)
     if dt is None:
         utc = datetime.now(ts.utc)
     else:
@@ -40,62 +100,320 @@ async def join_result_for_correct_time(results, dt):
 
     for day_ in results:
         for key, value in day_.get("areas", {}).items():
-            zone = tzs.get(key)
-            if zone is None:
+            bounds = await local_day_bounds(key, utc)
+            if bounds is None:
                 _LOGGER.debug("Skipping %s", key)
                 continue
-            else:
-                zone = await dt_utils.async_get_time_zone(zone)
 
-            # We add junk here as the peak etc
-            # from the api is based on cet, not the
-            # hours in the we want so invalidate them
-            # its later corrected in the sensor.
-            value = add_junk(value)
-
-            values = day_["areas"][key].pop("values")
+            # The parsed day may be cached, so don't modify it.
+            values = value["values"].between(*bounds)
+            if any(map(math.isinf, values.values)):
+                raise InvalidValueException(
+                    f"Invalid value in {values} for area '{key}'"
+                )
 
             # We need to check this so we dont overwrite stuff.
             if key not in fin["areas"]:
-                fin["areas"][key] = {}
-            fin["areas"][key].update(value)
-            if "values" not in fin["areas"][key]:
-                fin["areas"][key]["values"] = []
+                fin["areas"][key] = {"values": PriceSeries(step=values.step)}
+            fin["areas"][key]["values"].extend(values)
+
+    return fin
 
-            start_of_day = utc.astimezone(zone).replace(
-                hour=0, minute=0, second=0, microsecond=0
+
+async def plan_delivery_dates(end_date, areas) -> list:
+    """Return the delivery dates needed to cover the local day of end_date
+    in every area.
+
+    A delivery date covers a day in CET, so areas in CET only need one
+    while areas in EET need the day before too.
+    """
+    cet = await dt_utils.async_get_time_zone("Europe/Stockholm")
+    dates = set()
+    for area in areas:
+        bounds = await local_day_bounds(area, end_date)
+        if bounds is None:
+            # We don't know where the day starts, get all that could overlap.
+            day = end_date.astimezone(cet).date()
+            dates.update((day - timedelta(days=1), day, day + timedelta(days=1)))
+            continue
+
+        day = datetime.fromtimestamp(bounds[0], cet).date()
+        last = datetime.fromtimestamp(bounds[1] - 1, cet).date()
+        while day <= last:
+            dates.add(day)
+            day += timedelta(days=1)
+
+    return sorted(dates)
+
+
+class ParseExecutor:
+    """Runs parsing of responses off the event loop.
+
+    Jobs go to a small dedicated pool so they don't queue behind everything
+    else in Home Assistant's default executor. Jobs estimated to take less
+    than `inline_threshold` seconds, from the measured time per row, are
+    parsed inline as the thread hop would cost more than it saves.
+    """
+
+    def __init__(self, max_workers=2, max_pending=4, inline_threshold=0.002):
+        self._max_workers = max_workers
+        self._executor = None
+        self._pending = None
+        self._max_pending = max_pending
+        self._inline_threshold = inline_threshold
+        # Exponential moving average of the parse time per row.
+        self.row_time = None
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.jobs = 0
+        self.inline_jobs = 0
+        self.parse_time = 0.0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "jobs": self.jobs,
+            "inline_jobs": self.inline_jobs,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "parse_time": self.parse_time,
+            "row_time": self.row_time,
+        }
+
+    def _timed(self, func, rows):
+        start = monotonic()
+        try:
+            return func()
+        finally:
+            elapsed = monotonic() - start
+            self.parse_time += elapsed
+            if rows:
+                per_row = elapsed / rows
+                if self.row_time is None:
+                    self.row_time = per_row
+                else:
+                    self.row_time = 0.8 * self.row_time + 0.2 * per_row
+
+    async def run(self, func, rows=0):
+        """Run func and return the result, inline or in the pool."""
+        self.jobs += 1
+        if self.row_time is not None and self.row_time * rows < self._inline_threshold:
+            self.inline_jobs += 1
+            return self._timed(func, rows)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="nordpool_parse"
             )
-            end_of_day = utc.astimezone(zone).replace(
-                hour=23, minute=59, second=59, microsecond=999999
+        if self._pending is None:
+            self._pending = asyncio.Semaphore(self._max_pending)
+
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            async with self._pending:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    self._executor, self._timed, func, rows
+                )
+        finally:
+            self.queue_depth -= 1
+            _LOGGER.debug("Parse executor %s", self.stats)
+
+    def shutdown(self) -> None:
+        """Stop the pool, a new one is started when needed."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._pending = None
+
+
+PARSE_EXECUTOR = ParseExecutor()
+
+
+class CircuitBreaker:
+    """Stops requests to the API after repeated failures.
+
+    After `threshold` failed requests in a row the breaker opens and requests
+    fail right away with CircuitOpenException. After `reset_timeout` seconds
+    one trial request is let through (half open), it closes the breaker if
+    it succeeds and opens it again if it fails.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold=5, reset_timeout=300):
+        self._threshold = threshold
+        self._reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "last_error": self.last_error,
+        }
+
+    def allow(self) -> bool:
+        """Check if a request may be made, moves an open breaker to half open.
+
+        A half open breaker lets another trial through if the last one
+        didn't finish within `reset_timeout`.
+        """
+        if self.state == self.CLOSED:
+            return True
+        if monotonic() - self.opened_at >= self._reset_timeout:
+            _LOGGER.debug("Circuit breaker half open, trying a request")
+            self.state = self.HALF_OPEN
+            self.opened_at = monotonic()
+            return True
+        self.rejected += 1
+        return False
+
+    def success(self) -> None:
+        if self.state != self.CLOSED:
+            _LOGGER.info("Nord Pool API is available again, circuit breaker closed")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def failure(self, err) -> None:
+        self.failures += 1
+        self.last_error = repr(err)
+        if self.state == self.HALF_OPEN or (
+            self.state == self.CLOSED and self.failures >= self._threshold
+        ):
+            _LOGGER.warning(
+                "Nord Pool API failed %s times, pausing requests for %s seconds: %s",
+                self.failures,
+                self._reset_timeout,
+                err,
             )
+            self.state = self.OPEN
+            self.opened_at = monotonic()
+            self.trips += 1
 
-            for val in values:
-                local = val["start"].astimezone(zone)
-                local_end = val["end"].astimezone(zone)
-                if start_of_day <= local <= end_of_day:
-                    if local == local_end:
-                        _LOGGER.info(
-                            "Hour has the same start and end, most likly due to dst change %s exluded this hour",
-                            val,
-                        )
-                    elif val["value"] in INVALID_VALUES:
-                        raise InvalidValueException(
-                            f"Invalid value in {val} for area '{key}'"
-                        )
-                    else:
-                        fin["areas"][key]["values"].append(val)
 
-    return fin
+CIRCUIT_BREAKER = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_RESET_TIMEOUT)
+
+
+class RateLimiter:
+    """Token bucket shared by every request to the API.
+
+    Tokens are added at `rate` per second up to `burst`. Requests that find
+    the bucket empty wait in a queue ordered by priority, a lower value goes
+    first, and in arrival order within a priority.
+    """
+
+    def __init__(self, rate=1.0, burst=10):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._updated = monotonic()
+        # (priority, seq, future) of the waiting requests.
+        self._waiters = []
+        self._seq = count()
+        self._timer = None
+        self.requests = defaultdict(int)
+        self.waited = defaultdict(int)
+        self.wait_time = defaultdict(float)
+        self.max_wait = defaultdict(float)
+        self.max_queue_depth = 0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "tokens": round(self._tokens, 2),
+            "queue_depth": sum(not i[2].done() for i in self._waiters),
+            "max_queue_depth": self.max_queue_depth,
+            "requests": dict(self.requests),
+            "waited": dict(self.waited),
+            "wait_time": dict(self.wait_time),
+            "max_wait": dict(self.max_wait),
+        }
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    async def acquire(self, priority=PRIORITY_REFRESH) -> None:
+        """Wait for a token."""
+        self.requests[priority] += 1
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        heappush(self._waiters, (priority, next(self._seq), fut))
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        self._schedule()
+
+        start = monotonic()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Got the token but won't use it.
+                self._tokens += 1
+            raise
+        finally:
+            waited = monotonic() - start
+            self.waited[priority] += 1
+            self.wait_time[priority] += waited
+            self.max_wait[priority] = max(self.max_wait[priority], waited)
+
+    def _schedule(self) -> None:
+        if self._timer is None:
+            delay = max(0, (1 - self._tokens) / self._rate)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._release)
+
+    def _release(self) -> None:
+        """Hand out the tokens to the waiting requests."""
+        self._timer = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            _, _, fut = heappop(self._waiters)
+            if fut.done():
+                continue
+            self._tokens -= 1
+            fut.set_result(None)
+
+        if self._waiters:
+            self._schedule()
+
+
+RATE_LIMITER = RateLimiter(RATE_LIMIT, RATE_BURST)
 
 
 class AioPrices:
     """Interface"""
 
-    def __init__(self, currency, client, timeezone=None):
+    def __init__(
+        self, currency, client, timeezone=None, cache=None, priority=PRIORITY_REFRESH
+    ):
         # super().__init__(currency)
         self.client = client
         self.timeezone = timeezone
-        (self.HOURLY, self.DAILY, self.WEEKLY, self.MONTHLY, self.YEARLY) = (
+        # Optional PriceCache shared between instances.
+        self.cache = cache
+        # (url, params) -> (ETag, Last-Modified) of the last response.
+        self._validators = {}
+        # Priority of the requests in RATE_LIMITER.
+        self.priority = priority
+        self.HOURLY, self.DAILY, self.WEEKLY, self.MONTHLY, self.YEARLY = (
             "DayAheadPrices",
             "AggregatePrices",
             "AggregatePrices",
@@ -105,22 +423,104 @@ class AioPrices:
         self.API_URL = "https://dataportal-api.nordpoolgroup.com/api/%s"
         self.currency = currency
 
-    async def _io(self, url, **kwargs):
-        resp = await self.client.get(url, params=kwargs)
-        _LOGGER.debug("requested %s %s", resp.url, kwargs)
+    async def _io(self, url, conditional=False, **kwargs):
+        """Request url, if conditional the ETag or Last-Modified from the last
+        response for the same request is sent along and NOT_MODIFIED is
+        returned when the data hasn't changed.
+
+        Each attempt times out after REQUEST_TIMEOUT seconds. Timeouts,
+        connection errors and TRANSIENT_STATUSES are retried REQUEST_RETRIES
+        times with exponential backoff, and counted by the circuit breaker
+        when they persist.
+        """
+        if not CIRCUIT_BREAKER.allow():
+            raise CircuitOpenException(
+                "Nord Pool API is unavailable, %s" % CIRCUIT_BREAKER.last_error
+            )
+
+        key = (url, tuple(sorted(kwargs.items())))
+        headers = {}
+        if conditional and key in self._validators:
+            etag, last_modified = self._validators[key]
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        for attempt in range(REQUEST_RETRIES + 1):
+            try:
+                res = await self._request(key, url, headers, kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                transient = not isinstance(err, aiohttp.ClientResponseError) or (
+                    err.status in TRANSIENT_STATUSES
+                )
+                if not transient:
+                    # The API is up, the request is wrong.
+                    CIRCUIT_BREAKER.success()
+                    raise
+                if attempt == REQUEST_RETRIES:
+                    CIRCUIT_BREAKER.failure(err)
+                    raise
+
+                delay = min(30, 2**attempt) * random.uniform(0.5, 1)
+                retry_after = getattr(err, "headers", None) and err.headers.get(
+                    "Retry-After"
+                )
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, min(30, int(retry_after)))
+                _LOGGER.debug(
+                    "Request to %s failed (%r), retrying in %.1f s", url, err, delay
+                )
+                await asyncio.sleep(delay)
+            else:
+                CIRCUIT_BREAKER.success()
+                return res
+
+    async def _request(self, key, url, headers, params):
+        await RATE_LIMITER.acquire(self.priority)
+        async with asyncio.timeout(REQUEST_TIMEOUT):
+            resp = await self.client.get(url, params=params, headers=headers)
+            _LOGGER.debug("requested %s %s", resp.url, params)
 
-        if resp.status == 204:
-            return None
+            if resp.status == 304:
+                return NOT_MODIFIED
 
-        return await resp.json()
+            if resp.status == 204:
+                return None
+
+            resp.raise_for_status()
+
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+            if etag or last_modified:
+                self._validators.pop(key, None)
+                self._validators[key] = (etag, last_modified)
+                if len(self._validators) > 64:
+                    del self._validators[next(iter(self._validators))]
+
+            return await resp.json()
 
     def _parse_dt(self, time_str):
         """Parse datetimes to UTC from Stockholm time, which Nord Pool uses."""
-        time = parse_dt(time_str, tzinfos={"Z": timezone("Europe/Stockholm")})
+        time = parse_dt(time_str, tzinfos={"Z": _STOCKHOLM})
         if time.tzinfo is None:
-            return timezone("Europe/Stockholm").localize(time).astimezone(utc)
+            return _STOCKHOLM.localize(time).astimezone(utc)
         return time.astimezone(utc)
 
+    def _parse_ts(self, time_str):
+        """Parse datetimes to epoch seconds.
+
+        The api uses ISO 8601 like 2025-10-01T22:00:00Z, anything else
+        is left to _parse_dt.
+        """
+        try:
+            time = datetime.fromisoformat(time_str)
+        except ValueError:
+            return self._parse_dt(time_str).timestamp()
+        if time.tzinfo is None:
+            return _STOCKHOLM.localize(time).timestamp()
+        return time.timestamp()
+
     def _parse_json(self, data, areas=None, data_type=None):
         """
         Parse json response from fetcher.
@@ -130,7 +530,7 @@ class AioPrices:
             - update time
             - currency
             - dictionary of areas, based on selection
-                - list of values (dictionary with start and endtime and value)
+                - values as a PriceSeries
                 - possible other values, such as min, max, average for hourly
         """
 
@@ -168,42 +568,67 @@ class AioPrices:
         if currency != self.currency:
             raise CurrencyMismatch
 
-        start_time = None
-        end_time = None
-        # multiAreaDailyAggregates
-        if len(data[data_source[0]]) > 0:
-            start_time = self._parse_dt(data[data_source[0]][0]["deliveryStart"])
-            end_time = self._parse_dt(data[data_source[0]][-1]["deliveryEnd"])
-        updated = self._parse_dt(data["updatedAt"])
+        rows = data[data_source[0]]
+        wanted = set(areas)
+        n_rows = len(rows)
 
-        area_data = {}
+        # Most rows starts when the previous ended, so parse each string once.
+        parsed = {}
+
+        def parse_ts(time_str):
+            ts = parsed.get(time_str)
+            if ts is None:
+                ts = parsed[time_str] = self._parse_ts(time_str)
+            return ts
+
+        starts = array("d")
+        ends = array("d")
+        # One column of values per area, nan where the row lacks the area.
+        columns = {}
 
         # Loop through response rows
-        for r in data[data_source[0]]:
-            row_start_time = self._parse_dt(r["deliveryStart"])
-            row_end_time = self._parse_dt(r["deliveryEnd"])
-
-            # Loop through columns
-            for area_key in r[data_source[1]].keys():
-                area_price = r[data_source[1]][area_key]
-                # If areas is defined and name isn't in areas, skip column
-                if area_key not in areas:
+        for i, r in enumerate(rows):
+            starts.append(parse_ts(r["deliveryStart"]))
+            ends.append(parse_ts(r["deliveryEnd"]))
+
+            # Loop through columns, skipping areas that wasn't requested
+            for area_key, area_price in r[data_source[1]].items():
+                if area_key not in wanted:
                     continue
 
-                # If name isn't in area_data, initialize dictionary
-                if area_key not in area_data:
-                    area_data[area_key] = {
-                        "values": [],
-                    }
-
-                # Append dictionary to value list
-                area_data[area_key]["values"].append(
-                    {
-                        "start": row_start_time,
-                        "end": row_end_time,
-                        "value": self._conv_to_float(area_price),
-                    }
+                column = columns.get(area_key)
+                if column is None:
+                    column = columns[area_key] = array("d", [math.nan]) * n_rows
+
+                if type(area_price) is not float:
+                    area_price = self._conv_to_float(area_price)
+                column[i] = area_price
+
+        start_time = None
+        end_time = None
+        if n_rows > 0:
+            start_time = datetime.fromtimestamp(starts[0], utc)
+            end_time = datetime.fromtimestamp(ends[-1], utc)
+        updated = self._parse_dt(data["updatedAt"])
+
+        # The rows are the same for every area, so check the grid once.
+        step = ends[0] - starts[0] if n_rows > 0 else None
+        regular = bool(step) and all(
+            starts[i] == starts[0] + i * step and ends[i] - starts[i] == step
+            for i in range(n_rows)
+        )
+
+        area_data = {}
+        for area_key, column in columns.items():
+            if regular and not any(map(math.isnan, column)):
+                values = PriceSeries(starts[0], step, column)
+            else:
+                values = PriceSeries.from_periods(
+                    (start, end, value)
+                    for start, end, value in zip(starts, ends, column)
+                    if not math.isnan(value)
                 )
+            area_data[area_key] = {"values": values}
 
         return {
             "start": start_time,
@@ -213,7 +638,9 @@ class AioPrices:
             "areas": area_data,
         }
 
-    async def _fetch_json(self, data_type, end_date=None, areas=None):
+    async def _fetch_json(
+        self, data_type, end_date=None, areas=None, conditional=False
+    ):
         """Fetch JSON from API"""
         # If end_date isn't set, default to tomorrow
         if data_type is None:
@@ -242,7 +669,7 @@ class AioPrices:
             kws.pop("date")
             kws["year"] = end_date.strftime("%Y")
 
-        return await self._io(self.API_URL % data_type, **kws)
+        return await self._io(self.API_URL % data_type, conditional, **kws)
 
     # Add more exceptions as we find them. KeyError is raised when the api return
     # junk due to currency not being available in the data.
@@ -267,7 +694,7 @@ class AioPrices:
             - update time
             - currency
             - dictionary of areas, based on selection
-                - list of values (dictionary with start and endtime and value)
+                - values as a PriceSeries
                 - possible other values, such as min, max, average for hourly
         """
         if areas is None:
@@ -280,38 +707,184 @@ class AioPrices:
             end_date = parse_dt(end_date)
 
         today = end_date
-        yesterday = today - timedelta(days=1)
-        tomorrow = today + timedelta(days=1)
 
         if data_type == self.HOURLY:
             if raw:
                 return await self._fetch_json(data_type, today, areas)
-            jobs = [
-                self._fetch_json(data_type, yesterday, areas),
-                self._fetch_json(data_type, today, areas),
-                self._fetch_json(data_type, tomorrow, areas),
-            ]
+            if not isinstance(areas, list):
+                areas = [i.strip() for i in areas.split(",")]
+            days = await plan_delivery_dates(end_date, areas)
         else:
             # This is really not today but a year..
             # All except from hourly returns the raw values
             return await self._fetch_json(data_type, today, areas)
 
-        res = await asyncio.gather(*jobs)
-        raw = [
-            await self._async_parse_json(i, areas, data_type=data_type)
-            for i in res
-            if i
-        ]
+        parsed = {}
+        missing = []
+        # Expired cached days, revalidated instead of parsed again.
+        stale = {}
+        # Days another request is fetching, and the tasks fetching them.
+        joined = {}
+        for day in days:
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.get(day, self.currency, areas)
+                if cached is None:
+                    task = self.cache.inflight(day, self.currency, areas)
+                    if task is not None:
+                        joined[day] = task
+                        continue
+                    expired = self.cache.get_stale(day, self.currency, areas)
+                    if expired is not None:
+                        stale[day] = expired
+            if cached is not None:
+                parsed[day] = cached
+            else:
+                missing.append(day)
+
+        tasks = list(dict.fromkeys(joined.values()))
+        if missing:
+            task = asyncio.ensure_future(
+                self._fetch_days(data_type, missing, areas, stale)
+            )
+            if self.cache is not None:
+                self.cache.add_inflight(missing, self.currency, areas, task)
+            tasks.append(task)
+
+        for result in await asyncio.gather(*(asyncio.shield(i) for i in tasks)):
+            for day, data in result.items():
+                if day in days:
+                    parsed[day] = data
+
+        raw = [parsed[day] for day in days if day in parsed]
 
         return await join_result_for_correct_time(raw, end_date)
 
+    async def _fetch_days(self, data_type, days, areas, stale) -> dict:
+        """Fetch and parse delivery dates, all in one parse job.
+
+        Returns the parsed responses by delivery date, expired cached days
+        are reused if they are unchanged or the API is unavailable.
+        """
+        res = await asyncio.gather(
+            *[
+                self._fetch_or_stale(data_type, day, areas, stale.get(day))
+                for day in days
+            ]
+        )
+        parsed = {}
+        responses = []
+        for day, i in zip(days, res):
+            if i is STALE:
+                parsed[day] = stale[day]
+            elif day in stale and (
+                i is NOT_MODIFIED
+                or (i and self._parse_dt(i["updatedAt"]) == stale[day]["updated"])
+            ):
+                _LOGGER.debug("Prices for %s %s are unchanged", day, self.currency)
+                parsed[day] = stale[day]
+                self.cache.set(day, self.currency, areas, stale[day])
+            elif i and i is not NOT_MODIFIED:
+                responses.append((day, i))
+        results = await self._async_parse_many(
+            [i for _, i in responses], areas, data_type=data_type
+        )
+        for (day, _), result in zip(responses, results):
+            parsed[day] = result
+            if self.cache is not None:
+                self.cache.set(day, self.currency, areas, result)
+        return parsed
+
+    async def _fetch_or_stale(self, data_type, day, areas, stale):
+        """Fetch a day, STALE if the API is unavailable and there is cached data."""
+        try:
+            return await self._fetch_json(
+                data_type, day, areas, conditional=stale is not None
+            )
+        except UPSTREAM_ERRORS as err:
+            if stale is None:
+                raise
+            _LOGGER.warning("Using cached prices for %s, %s", day, err)
+            return STALE
+
     async def _async_parse_json(self, data, areas, data_type):
         """
         Async version of _parse_json to prevent blocking calls inside the event loop.
         """
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            None, self._parse_json, data, areas, data_type
+        results = await self._async_parse_many([data], areas, data_type)
+        return results[0]
+
+    async def _async_parse_many(self, responses, areas, data_type):
+        """Parse several responses in one job on the parse executor."""
+        if not responses:
+            return []
+
+        def parse_all():
+            return [self._parse_json(i, areas, data_type) for i in responses]
+
+        rows = sum(len(i.get("multiAreaEntries", ())) for i in responses)
+        return await PARSE_EXECUTOR.run(parse_all, rows)
+
+    async def iter_days(self, start, end, areas, concurrency=4, cache=None, ttl=None):
+        """Yield (delivery date, parsed response) for the CET delivery dates
+        from start to end, both included.
+
+        At most `concurrency` dates are fetched at a time. Each response is
+        parsed as it arrives and only the parsed prices are kept until they
+        are yielded, in date order. Dates without prices are skipped. With a
+        ResponseCache each date is looked up in it first, and stored for
+        `ttl(date)` seconds.
+        """
+        if not isinstance(areas, list):
+            areas = [i.strip() for i in areas.split(",")]
+
+        days = deque(start + timedelta(days=i) for i in range((end - start).days + 1))
+        pending = deque()
+
+        async def load_day(day):
+            data = await self._fetch_json(self.HOURLY, day, areas)
+            if not data:
+                return None
+            return await self._async_parse_json(data, areas, self.HOURLY)
+
+        async def fetch_day(day):
+            if cache is None:
+                return await load_day(day)
+            return await cache.get_or_fetch(
+                (self.currency, tuple(sorted(areas)), day),
+                lambda: load_day(day),
+                None if ttl is None else ttl(day),
+            )
+
+        try:
+            while days or pending:
+                while days and len(pending) < concurrency:
+                    day = days.popleft()
+                    pending.append((day, asyncio.ensure_future(fetch_day(day))))
+
+                day, task = pending.popleft()
+                data = await task
+                if data:
+                    yield day, data
+                else:
+                    _LOGGER.debug("No prices for %s", day)
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    async def published(self, delivery_date, area) -> bool:
+        """Check if the prices for a CET delivery date are published for an area.
+
+        A cheap request for one delivery date and area, nothing is parsed or
+        cached.
+        """
+        res = await self._fetch_json(self.HOURLY, delivery_date, [area])
+        if not res:
+            return False
+        entries = res.get("multiAreaEntries") or []
+        return len(entries) > 0 and not any(
+            math.isinf(self._conv_to_float(i["entryPerArea"].get(area)))
+            for i in entries
         )
 
     async def hourly(self, end_date=None, areas=None, raw=False):
@@ -346,10 +919,10 @@ class AioPrices:
 
     def _conv_to_float(self, s):
         """Convert numbers to float. Return infinity, if conversion fails."""
-        # Skip if already float
-        if isinstance(s, float):
-            return s
+        # Skip if already a number
+        if isinstance(s, (int, float)):
+            return float(s)
         try:
             return float(s.replace(",", ".").replace(" ", ""))
-        except ValueError:
+        except (AttributeError, ValueError):
             return float("inf")
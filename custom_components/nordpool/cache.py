@@ -0,0 +1,233 @@
+"""Caches for responses from the Nord Pool API."""
+
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+from homeassistant.util import dt as dt_utils
+
+from .misc import stockholm_tz
+
+_LOGGER = logging.getLogger(__name__)
+
+__all__ = ["PriceCache", "ResponseCache"]
+
+
+def _delivery_date(day) -> date:
+    """The delivery date of a date or datetime."""
+    if isinstance(day, datetime):
+        return day.date()
+    return day
+
+
+def _area_set(areas) -> frozenset:
+    if isinstance(areas, str):
+        areas = [i.strip() for i in areas.split(",")]
+    return frozenset(areas or [])
+
+
+def _is_complete(data, areas) -> bool:
+    """Check that every requested area is there, has values and none of them
+    are invalid."""
+    found = data.get("areas") or {}
+    if not found or not areas <= found.keys():
+        return False
+    for area in found.values():
+        values = area.get("values")
+        if not values or any(math.isinf(v) or math.isnan(v) for v in values.values):
+            return False
+    return True
+
+
+class PriceCache:
+    """Parsed DayAheadPrices responses keyed by (delivery date, currency, areas).
+
+    Delivery dates before today (CET) can't change and are kept until they are
+    older than `keep_days`. Today and later dates expire after `ttl` seconds
+    so they are revalidated against the API, expired entries are kept so the
+    revalidation can reuse them if the data is unchanged. A cached response
+    is also used for a request for a subset of its areas. The fetches in
+    flight are kept per delivery date too, so overlapping requests share
+    them.
+    """
+
+    def __init__(self, ttl=3600, keep_days=2, max_entries=64):
+        self._ttl = ttl
+        self._keep_days = keep_days
+        self._max_entries = max_entries
+        # (delivery date, currency, areas) -> (expires, data)
+        self._entries = {}
+        # (delivery date, currency, areas) -> task of the fetch in flight
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, day, currency, areas):
+        """Return the cached response or None."""
+        data = self._lookup(day, currency, areas, expired=False)
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def get_stale(self, day, currency, areas):
+        """Return an expired cached response, to be revalidated, or None."""
+        return self._lookup(day, currency, areas, expired=True)
+
+    def _lookup(self, day, currency, areas, expired):
+        day = _delivery_date(day)
+        areas = _area_set(areas)
+        now = time.monotonic()
+
+        for (c_day, c_currency, c_areas), (expires, data) in self._entries.items():
+            if c_day != day or c_currency != currency or not areas <= c_areas:
+                continue
+            if expired != (expires is not None and expires <= now):
+                continue
+
+            if areas == c_areas:
+                return data
+            return {
+                **data,
+                "areas": {k: v for k, v in data["areas"].items() if k in areas},
+            }
+
+        return None
+
+    def set(self, day, currency, areas, data) -> None:
+        """Cache a parsed response, incomplete responses are not cached."""
+        areas = _area_set(areas)
+        if not data or not _is_complete(data, areas):
+            return
+
+        day = _delivery_date(day)
+        if day < self._today():
+            expires = None
+        else:
+            expires = time.monotonic() + self._ttl
+
+        self._entries[(day, currency, areas)] = (expires, data)
+        self._evict()
+
+    def inflight(self, day, currency, areas):
+        """The task fetching a delivery date, None if there is none."""
+        task = self._inflight.get((_delivery_date(day), currency, _area_set(areas)))
+        if task is not None:
+            self.coalesced += 1
+        return task
+
+    def add_inflight(self, days, currency, areas, task) -> None:
+        """Register a task fetching delivery dates until it is done."""
+        keys = [(_delivery_date(day), currency, _area_set(areas)) for day in days]
+        for key in keys:
+            self._inflight[key] = task
+
+        def done(_):
+            for key in keys:
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+
+        task.add_done_callback(done)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _today(self) -> date:
+        return dt_utils.now().astimezone(stockholm_tz).date()
+
+    def _evict(self) -> None:
+        """Drop old entries, and the oldest dates above max_entries."""
+        oldest = self._today() - timedelta(days=self._keep_days)
+        for key in list(self._entries):
+            if key[0] < oldest:
+                del self._entries[key]
+
+        if len(self._entries) > self._max_entries:
+            for key in sorted(self._entries, key=lambda k: k[0])[
+                : len(self._entries) - self._max_entries
+            ]:
+                del self._entries[key]
+
+        _LOGGER.debug(
+            "Price cache has %s entries, hits %s misses %s",
+            len(self._entries),
+            self.hits,
+            self.misses,
+        )
+
+
+class ResponseCache:
+    """Least recently used cache of service responses.
+
+    Entries expire after the ttl they were stored with, entries stored
+    without one are kept until they are the least recently used above
+    `max_entries`. Concurrent calls for a key that isn't cached share one
+    fetch. Empty responses are not cached.
+    """
+
+    def __init__(self, max_entries=256):
+        self._max_entries = max_entries
+        # key -> (expires, value), least recently used first
+        self._entries = OrderedDict()
+        # key -> task of the fetch in flight
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+    async def get_or_fetch(self, key, fetch, ttl=None):
+        """Return the cached value for key, or the value of `await fetch()`."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires is None or expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch(key, fetch, ttl))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key, fetch, ttl):
+        try:
+            value = await fetch()
+        finally:
+            self._inflight.pop(key, None)
+
+        if value:
+            expires = None if ttl is None else time.monotonic() + ttl
+            self._entries[key] = (expires, value)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        _LOGGER.debug("Service response cache %s", self.stats)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -1,4 +1,5 @@
 """Adds config flow for nordpool."""
+
 import logging
 import re
 
@@ -8,12 +9,21 @@ from homeassistant.helpers.template import Template
 
 from . import DOMAIN
 from .sensor import _PRICE_IN, _REGIONS, DEFAULT_TEMPLATE
-from .const import DEFAULT_PERIOD_TYPE, PERIOD_HOURLY, PERIOD_15MIN
+from .const import (
+    ATTRIBUTES_COMPACT,
+    ATTRIBUTES_FULL,
+    ATTRIBUTES_MINIMAL,
+    DEFAULT_ATTRIBUTES,
+    DEFAULT_PERIOD_TYPE,
+    PERIOD_HOURLY,
+    PERIOD_15MIN,
+)
 
 regions = sorted(list(_REGIONS.keys()))
 currencys = sorted(list(set(v[0] for k, v in _REGIONS.items())))
 price_types = sorted(list(_PRICE_IN.keys()))
 period_types = [PERIOD_15MIN, PERIOD_HOURLY]  # 15min first (default)
+attribute_profiles = [ATTRIBUTES_FULL, ATTRIBUTES_COMPACT, ATTRIBUTES_MINIMAL]
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -58,7 +68,12 @@ class NordpoolFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             vol.Optional("low_price_cutoff", default=1.0): vol.Coerce(float),
             vol.Optional("price_in_cents", default=False): bool,
             vol.Optional("price_type", default="kWh"): vol.In(price_types),
-            vol.Optional("period_type", default=DEFAULT_PERIOD_TYPE): vol.In(period_types),
+            vol.Optional("period_type", default=DEFAULT_PERIOD_TYPE): vol.In(
+                period_types
+            ),
+            vol.Optional("attributes", default=DEFAULT_ATTRIBUTES): vol.In(
+                attribute_profiles
+            ),
             vol.Optional("additional_costs", default=""): str,
         }
 
@@ -67,6 +82,7 @@ class NordpoolFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             "currency": currencys,
             "price_type": price_types,
             "period_type": period_types,
+            "attributes": attribute_profiles,
             "additional_costs": "{{0.0|float}}",
         }
 
@@ -8,6 +8,22 @@ EVENT_NEW_HOUR = "nordpool_update_hour"
 EVENT_NEW_DAY = "nordpool_update_day"
 EVENT_NEW_PRICE = "nordpool_update_new_price"
 SENTINEL = object()
+# Max number of (currency, day) fetches running at the same time.
+MAX_CONCURRENT_FETCHES = 4
+# Seconds before a request to the API times out, and retries of failed ones.
+REQUEST_TIMEOUT = 10
+REQUEST_RETRIES = 2
+# Failed requests in a row before pausing requests, and for how many seconds.
+BREAKER_THRESHOLD = 3
+BREAKER_RESET_TIMEOUT = 300
+# Requests per second to the API, and how many may be made in a burst.
+RATE_LIMIT = 1.0
+RATE_BURST = 10
+# Priorities of the requests, a lower value is served first.
+PRIORITY_REFRESH = 0
+PRIORITY_SERVICE = 1
+# Seconds service responses for the current day or year are cached.
+SERVICE_CACHE_TTL = 3600
 
 _CURRENCY_LIST = ["DKK", "EUR", "NOK", "SEK"]
 
@@ -93,8 +109,6 @@ AREA_TO_COUNTRY = {
     "PL ": "PL",
 }
 
-INVALID_VALUES = frozenset((None, float("inf")))
-
 DEFAULT_TEMPLATE = "{{0.0|float}}"
 
 # Period types
@@ -102,6 +116,15 @@ PERIOD_HOURLY = "hour"
 PERIOD_15MIN = "15min"
 DEFAULT_PERIOD_TYPE = PERIOD_15MIN
 
+# Lengths in hours of the cheapest and most expensive windows attributes
+WINDOW_HOURS = (1, 2, 3, 4)
+
+# Attribute profiles, how much of the price series the state carries
+ATTRIBUTES_FULL = "full"
+ATTRIBUTES_COMPACT = "compact"
+ATTRIBUTES_MINIMAL = "minimal"
+DEFAULT_ATTRIBUTES = ATTRIBUTES_FULL
+
 _CENT_MULTIPLIER = 100
 _PRICE_IN = {"kWh": 1000, "MWh": 1, "Wh": 1000 * 1000}
 _REGIONS = {
@@ -0,0 +1,38 @@
+"""Diagnostics for the Nord Pool integration."""
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .aio_price import CIRCUIT_BREAKER, PARSE_EXECUTOR, RATE_LIMITER
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the state of the API client, caches and polling."""
+    api = hass.data.get(DOMAIN)
+    data = {
+        "circuit_breaker": CIRCUIT_BREAKER.stats,
+        "parse_executor": PARSE_EXECUTOR.stats,
+        "rate_limiter": RATE_LIMITER.stats,
+    }
+    if api is not None:
+        data["currencies"] = api.currency
+        data["areas"] = api.areas
+        data["price_cache"] = {
+            "entries": len(api.cache),
+            "hits": api.cache.hits,
+            "misses": api.cache.misses,
+        }
+        data["sensors"] = {
+            entity_id: sensor.update_stats for entity_id, sensor in api.sensors.items()
+        }
+        if api.poller is not None:
+            data["tomorrow_poller"] = {
+                "stats": api.poller.stats,
+                "latency": api.poller.latency,
+            }
+    return data
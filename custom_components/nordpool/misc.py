@@ -1,23 +1,22 @@
 import logging
 from collections import defaultdict
 from operator import itemgetter
-from statistics import mean
 from decimal import Decimal
 
 import pytz
 from homeassistant.util import dt as dt_util
 from pytz import timezone
 
+from .stats import day_stats
+
 UTC = pytz.utc
 
 __all__ = [
     "is_new",
     "has_junk",
     "extract_attrs",
-    "start_of",
     "end_of",
     "stock",
-    "add_junk",
 ]
 
 _LOGGER = logging.getLogger(__name__)
@@ -43,29 +42,11 @@ def round_decimal(number, decimal_places=3):
     return decimal_value.quantize(Decimal(10) ** -decimal_places)
 
 
-def add_junk(d):
-    for key in ["Average", "Min", "Max", "Off-peak 1", "Off-peak 2", "Peak"]:
-        d[key] = float("inf")
-
-    return d
-
-
 def stock(d):
     """convert datetime to stocholm time."""
     return d.astimezone(stockholm_tz)
 
 
-def start_of(d, typ_="hour"):
-    if typ_ == "hour":
-        return d.replace(minute=0, second=0, microsecond=0)
-    elif typ_ == "15min":
-        # Round down to nearest 15-minute mark (0, 15, 30, 45)
-        quarter = (d.minute // 15) * 15
-        return d.replace(minute=quarter, second=0, microsecond=0)
-    elif typ_ == "day":
-        return d.replace(hour=0, minute=0, microsecond=0)
-
-
 def time_in_range(start, end, x):
     """Return true if x is in the range [start, end]"""
     if start <= end:
@@ -129,30 +110,22 @@ def has_junk(data) -> bool:
 def extract_attrs(data) -> dict:
     """extract attrs"""
     d = defaultdict(list)
-    items = [i.get("value") for i in data]
 
     if len(data):
         data = sorted(data, key=itemgetter("start"))
-
-        # Auto-detect period length based on data size
-        # 24 entries = hourly, 96 entries = 15min
-        periods_per_hour = len(data) // 24 if len(data) >= 24 else 1
-
-        # Calculate indices based on period type
-        # Off-peak 1: hours 0-8, Peak: hours 8-20, Off-peak 2: hours 20-24
-        offpeak1_end = 8 * periods_per_hour
-        peak_end = 20 * periods_per_hour
-
-        offpeak1 = [i.get("value") for i in data[0:offpeak1_end]]
-        peak = [i.get("value") for i in data[offpeak1_end:peak_end]]
-        offpeak2 = [i.get("value") for i in data[peak_end:]]
-
-        d["Peak"] = mean(peak) if peak else float("inf")
-        d["Off-peak 1"] = mean(offpeak1) if offpeak1 else float("inf")
-        d["Off-peak 2"] = mean(offpeak2) if offpeak2 else float("inf")
-        d["Average"] = mean(items)
-        d["Min"] = min(items)
-        d["Max"] = max(items)
+        stats = day_stats([i["start"] for i in data], [i.get("value") for i in data])
+        if stats is None:
+            return d
+
+        # Off-peak 1: hours 0-8, Peak: hours 8-20, Off-peak 2: hours 20-24,
+        # by the local time of the periods so DST days are split right.
+        inf = float("inf")
+        d["Peak"] = inf if stats["peak"] is None else stats["peak"]
+        d["Off-peak 1"] = inf if stats["off_peak_1"] is None else stats["off_peak_1"]
+        d["Off-peak 2"] = inf if stats["off_peak_2"] is None else stats["off_peak_2"]
+        d["Average"] = stats["average"]
+        d["Min"] = stats["min"]
+        d["Max"] = stats["max"]
 
         return d
 
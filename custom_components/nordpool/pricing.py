@@ -0,0 +1,166 @@
+"""Helpers to evaluate the additional_costs template cheaply."""
+
+import logging
+from functools import lru_cache
+
+from jinja2 import TemplateError, meta, nodes
+from jinja2.sandbox import ImmutableSandboxedEnvironment
+
+_LOGGER = logging.getLogger(__name__)
+
+# Template classes, from cheapest to most expensive to evaluate.
+# constant: renders the same value every time, folded into a number.
+# price: only depends on current_price, evaluated by a compiled function.
+# time: depends on now(), rendered once per period.
+# dynamic: reads states etc, rendered once per period and every update.
+TEMPLATE_CONSTANT = "constant"
+TEMPLATE_PRICE = "price"
+TEMPLATE_TIME = "time"
+TEMPLATE_DYNAMIC = "dynamic"
+
+# Globals that do not make the result depend on anything but the arguments.
+_PURE_NAMES = frozenset(("float", "int", "bool", "round", "min", "max", "abs"))
+# Globals that depend on the time.
+_TIME_NAMES = frozenset(("now", "utcnow", "today_at"))
+# Filters and tests that only depend on their arguments, any other one may
+# read states (like `states` or `is_state`) and makes the template dynamic.
+_PURE_FILTERS = frozenset(
+    (
+        "abs",
+        "as_datetime",
+        "as_local",
+        "as_timestamp",
+        "bool",
+        "d",
+        "default",
+        "first",
+        "float",
+        "format",
+        "int",
+        "last",
+        "length",
+        "list",
+        "lower",
+        "max",
+        "min",
+        "multiply",
+        "round",
+        "string",
+        "sum",
+        "timestamp_custom",
+        "timestamp_local",
+        "timestamp_utc",
+        "trim",
+        "upper",
+    )
+)
+_PURE_TESTS = frozenset(
+    (
+        "boolean",
+        "defined",
+        "divisibleby",
+        "eq",
+        "equalto",
+        "even",
+        "false",
+        "float",
+        "ge",
+        "gt",
+        "in",
+        "integer",
+        "le",
+        "lt",
+        "ne",
+        "none",
+        "number",
+        "odd",
+        "sameas",
+        "string",
+        "true",
+        "undefined",
+    )
+)
+
+# Prices used to check the compiled function against the real template.
+_SAMPLE_PRICES = (-0.5, 0.0, 0.0123, 0.25, 1.0, 3.75)
+
+# Sandboxed like Home Assistant's own template environment.
+_env = ImmutableSandboxedEnvironment(extensions=["jinja2.ext.loopcontrols"])
+_env.globals.update(
+    float=float, int=int, bool=bool, round=round, min=min, max=max, abs=abs
+)
+
+
+def _callee(node) -> str | None:
+    """Name of the global a call is made on, like now for now().hour."""
+    while isinstance(node, (nodes.Getattr, nodes.Getitem, nodes.Call)):
+        node = node.node
+    return node.name if isinstance(node, nodes.Name) else None
+
+
+def _is_pure(tree) -> bool:
+    """Check that the filters, tests and calls of a template can't read
+    anything but their arguments and the time."""
+    for node in tree.find_all(nodes.Filter):
+        if node.name not in _PURE_FILTERS:
+            return False
+    for node in tree.find_all(nodes.Test):
+        if node.name not in _PURE_TESTS:
+            return False
+    for node in tree.find_all(nodes.Call):
+        if _callee(node.node) not in _PURE_NAMES | _TIME_NAMES:
+            return False
+    return True
+
+
+def classify_template(source: str) -> str:
+    """Classify an additional_costs template by what its value depends on.
+
+    Anything that isn't known to be pure, like a filter or test that isn't
+    in the whitelists, makes the template dynamic.
+    """
+    try:
+        tree = _env.parse(source)
+    except TemplateError:
+        return TEMPLATE_DYNAMIC
+
+    if not _is_pure(tree):
+        return TEMPLATE_DYNAMIC
+
+    names = meta.find_undeclared_variables(tree) - _PURE_NAMES
+    if not names:
+        return TEMPLATE_CONSTANT
+    if names == {"current_price"}:
+        return TEMPLATE_PRICE
+    if names <= {"current_price"} | _TIME_NAMES:
+        return TEMPLATE_TIME
+    return TEMPLATE_DYNAMIC
+
+
+def compile_price_function(source: str, render):
+    """Compile a price only template to a plain function of current_price.
+
+    The template is compiled in a bare jinja environment, and only used if it
+    gives the same result as `render` for a couple of sample prices. Returns
+    None if the template can't be compiled that way.
+    """
+    try:
+        compiled = _env.from_string(source)
+    except TemplateError as err:
+        _LOGGER.debug("Unable to compile %s, %s", source, err)
+        return None
+
+    @lru_cache(maxsize=1024)
+    def func(price):
+        return float(compiled.render(current_price=price))
+
+    try:
+        for price in _SAMPLE_PRICES:
+            if func(price) != float(render(price)):
+                _LOGGER.debug("Compiled %s differs for price %s", source, price)
+                return None
+    except Exception as err:  # pylint: disable=broad-except
+        _LOGGER.debug("Unable to verify compiled %s, %s", source, err)
+        return None
+
+    return func
@@ -0,0 +1,198 @@
+"""Polling for tomorrow's prices around their publication."""
+
+import logging
+import random
+from datetime import datetime, time, timedelta
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_utils
+
+from .aio_price import InvalidValueException
+from .misc import stockholm_tz
+
+_LOGGER = logging.getLogger(__name__)
+
+__all__ = ["TomorrowPoller"]
+
+# When the day-ahead prices are usually published, Stockholm time.
+PUBLICATION = time(12, 45)
+
+
+class TomorrowPoller:
+    """Polls for tomorrow's prices.
+
+    Polling starts at the earliest publication seen for the areas (or at
+    PUBLICATION), every `dense_interval` seconds for `dense_window` seconds,
+    then with exponential backoff with jitter up to `max_interval` until
+    `max_time` after PUBLICATION. Each poll probes a single delivery date and
+    area, the full refresh is only done when the probe finds prices. How long
+    after PUBLICATION each area got its prices is remembered as a moving
+    average, so the next day starts polling closer to it.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api,
+        on_new_price,
+        dense_interval=60,
+        dense_window=20 * 60,
+        max_interval=30 * 60,
+        max_time=6 * 3600,
+        smoothing=0.3,
+    ):
+        self._hass = hass
+        self._api = api
+        # Coroutine function called with True if the prices changed.
+        self._on_new_price = on_new_price
+        self._dense_interval = dense_interval
+        self._dense_window = dense_window
+        self._max_interval = max_interval
+        self._max_time = max_time
+        self._smoothing = smoothing
+        # area -> seconds after PUBLICATION the prices were seen.
+        self.latency = {}
+        self.stats = {"probes": 0, "refreshes": 0, "published": 0, "gave_up": 0}
+        self._unsub = None
+        # Set when the integration is unloaded, a poll in flight then stops.
+        self._stopped = False
+        self._day = None
+        self._dense_until = None
+        self._attempt = 0
+        self._seen = set()
+
+    def start(self) -> None:
+        self._stopped = False
+        self._schedule(self._next_start(dt_utils.utcnow()))
+
+    @callback
+    def stop(self) -> None:
+        self._stopped = True
+        self._cancel()
+
+    def _cancel(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @staticmethod
+    def _publication(day) -> datetime:
+        return stockholm_tz.localize(datetime.combine(day, PUBLICATION))
+
+    def _next_start(self, now: datetime) -> datetime:
+        """When to start polling for the next publication after now."""
+        day = now.astimezone(stockholm_tz).date()
+        if self._day == day or now >= self._publication(day) + timedelta(
+            seconds=self._max_time
+        ):
+            day += timedelta(days=1)
+
+        self._day = day
+        self._attempt = 0
+        self._seen = set()
+
+        lead = 2 * self._dense_interval
+        start = self._publication(day) + timedelta(
+            seconds=max(0, min(self.latency.values(), default=0) - lead)
+        )
+        # Spread the requests of different installations.
+        start += timedelta(seconds=random.uniform(0, self._dense_interval))
+        start = max(start, now + timedelta(seconds=1))
+        self._dense_until = start + timedelta(seconds=self._dense_window)
+        return start
+
+    def _next_poll(self, now: datetime) -> datetime | None:
+        """When to poll again, None when it's time to give up for the day."""
+        publication = self._publication(self._day)
+        if now >= publication + timedelta(seconds=self._max_time):
+            return None
+
+        if now < self._dense_until:
+            delay = self._dense_interval
+        else:
+            self._attempt += 1
+            delay = random.uniform(
+                self._dense_interval,
+                min(self._max_interval, self._dense_interval * 2**self._attempt),
+            )
+        return now + timedelta(seconds=delay)
+
+    def _schedule(self, when: datetime) -> None:
+        self._cancel()
+        if self._stopped:
+            return
+        _LOGGER.debug("Next poll for tomorrow's prices at %s", when)
+        self._unsub = async_track_point_in_utc_time(self._hass, self._poll, when)
+
+    def _probe_area(self, missing):
+        """The missing area expected to be published last."""
+        return max(sorted(missing), key=lambda area: self.latency.get(area, 0))
+
+    def _record(self, areas, now: datetime) -> None:
+        latency = max(0.0, (now - self._publication(self._day)).total_seconds())
+        for area in areas - self._seen:
+            old = self.latency.get(area)
+            if old is None:
+                self.latency[area] = latency
+            else:
+                self.latency[area] = old + self._smoothing * (latency - old)
+        self._seen |= areas
+
+    async def _poll(self, now: datetime) -> None:
+        self._unsub = None
+        missing = self._api.missing_tomorrow()
+
+        if self._api.areas and missing:
+            if await self._probe(self._probe_area(missing)) and not self._stopped:
+                await self._refresh(now)
+                missing = self._api.missing_tomorrow()
+
+        if self._stopped:
+            return
+
+        if self._api.areas and not missing:
+            _LOGGER.debug(
+                "Tomorrow's prices are in, publication latency %s, %s",
+                self.latency,
+                self.stats,
+            )
+            self._schedule(self._next_start(now))
+            return
+
+        when = self._next_poll(now)
+        if when is None:
+            self.stats["gave_up"] += 1
+            if missing:
+                _LOGGER.warning("Tomorrow's prices for %s are missing", missing)
+            self._schedule(self._next_start(now))
+            return
+        self._schedule(when)
+
+    async def _probe(self, area) -> bool:
+        self.stats["probes"] += 1
+        try:
+            published = await self._api.tomorrow_published(area)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Probing tomorrow's prices for %s failed, %s", area, err)
+            return False
+
+        if published:
+            self.stats["published"] += 1
+        return published
+
+    async def _refresh(self, now: datetime) -> None:
+        self.stats["refreshes"] += 1
+        try:
+            changed = await self._api.update_tomorrow()
+        except InvalidValueException:
+            _LOGGER.debug("Tomorrow's prices are incomplete, retrying later")
+            changed = False
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Failed to fetch tomorrow's prices, %s", err)
+            return
+
+        if self._stopped:
+            return
+        self._record(set(self._api.areas) - self._api.missing_tomorrow(), now)
+        await self._on_new_price(changed)
@@ -0,0 +1,95 @@
+"""Selection of the cheapest, or most expensive, periods."""
+
+import heapq
+import math
+
+__all__ = ["cheapest_periods"]
+
+
+def cheapest_periods(starts, ends, values, count, min_run=1, highest=False) -> list:
+    """Indexes, in time order, of the `count` cheapest (or most expensive)
+    periods, where every run of consecutive selected periods is at least
+    `min_run` periods long.
+
+    Without a minimum run the periods are picked with a heap, O(n log k).
+    A minimum run can't be met by picking periods one by one, so then the
+    cheapest selection is found by dynamic programming over the number of
+    picked periods and the length of the current run, O(n * k * min_run).
+    Periods without a finite value are never picked. Returns an empty list
+    if there is no selection that meets the minimum run.
+    """
+    sign = -1 if highest else 1
+    candidates = [i for i in range(len(values)) if math.isfinite(values[i])]
+    count = min(count, len(candidates))
+    # No run can be min_run long, don't build the tables to find that out.
+    if count <= 0 or min_run > count:
+        return []
+
+    if min_run <= 1:
+        # nsmallest is stable, the earliest period wins a tie.
+        return sorted(
+            heapq.nsmallest(count, candidates, key=lambda i: sign * values[i])
+        )
+
+    return _with_min_run(starts, ends, values, count, min_run, sign)
+
+
+def _with_min_run(starts, ends, values, count, min_run, sign) -> list:
+    inf = math.inf
+    # cost[run][picked]: the lowest cost so far, where run is the length of
+    # the run the last period is in, 0 if it wasn't picked and at most
+    # min_run as longer runs are just as good.
+    cost = [[inf] * (count + 1) for _ in range(min_run + 1)]
+    cost[0][0] = 0.0
+    # The run of the previous period for each state, per period.
+    back = []
+
+    for i, value in enumerate(values):
+        usable = math.isfinite(value)
+        adjacent = i > 0 and starts[i] == ends[i - 1]
+        new = [[inf] * (count + 1) for _ in range(min_run + 1)]
+        choice = [[-1] * (count + 1) for _ in range(min_run + 1)]
+
+        for run in range(min_run + 1):
+            row = cost[run]
+            # A run can only end once it is long enough.
+            closable = run == 0 or run == min_run
+            for picked in range(min(count, i) + 1):
+                total = row[picked]
+                if total == inf:
+                    continue
+
+                if closable and total < new[0][picked]:
+                    new[0][picked] = total
+                    choice[0][picked] = run
+
+                if not usable or picked == count:
+                    continue
+                if run > 0 and adjacent:
+                    next_run = min(run + 1, min_run)
+                elif closable:
+                    next_run = 1
+                else:
+                    continue
+                total += sign * value
+                if total < new[next_run][picked + 1]:
+                    new[next_run][picked + 1] = total
+                    choice[next_run][picked + 1] = run
+
+        cost = new
+        back.append(choice)
+
+    run = min((0, min_run), key=lambda r: cost[r][count])
+    if cost[run][count] == inf:
+        return []
+
+    picked = count
+    selected = []
+    for i in range(len(values) - 1, -1, -1):
+        previous = back[i][run][picked]
+        if run > 0:
+            selected.append(i)
+            picked -= 1
+        run = previous
+    selected.reverse()
+    return selected
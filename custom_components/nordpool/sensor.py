@@ -1,7 +1,8 @@
+import asyncio
 import logging
 import math
-from operator import itemgetter
-from statistics import mean, median
+from array import array
+from bisect import bisect_left, bisect_right
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
@@ -37,13 +38,27 @@ from .const import (
     _REGIONS,
     _CURRENTY_TO_CENTS,
     _CENT_MULTIPLIER,
+    WINDOW_HOURS,
+    ATTRIBUTES_COMPACT,
+    ATTRIBUTES_FULL,
+    ATTRIBUTES_MINIMAL,
+    DEFAULT_ATTRIBUTES,
 )
-from .misc import start_of, stock
-
+from .misc import stock
+from .pricing import (
+    TEMPLATE_CONSTANT,
+    TEMPLATE_DYNAMIC,
+    TEMPLATE_PRICE,
+    classify_template,
+    compile_price_function,
+)
+from .selection import cheapest_periods
+from .series import PriceSeries
+from .stats import PrefixSums, day_stats, quantiles, ranks
+from .windows import best_window, rolling_extremes
 
 _LOGGER = logging.getLogger(__name__)
 
-
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
         vol.Optional(CONF_REGION, default=DEFAULT_REGION): vol.In(
@@ -61,9 +76,15 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
         vol.Optional("period_type", default=DEFAULT_PERIOD_TYPE): vol.In(
             [PERIOD_HOURLY, PERIOD_15MIN]
         ),
+        vol.Optional("attributes", default=DEFAULT_ATTRIBUTES): vol.In(
+            [ATTRIBUTES_FULL, ATTRIBUTES_COMPACT, ATTRIBUTES_MINIMAL]
+        ),
     }
 )
 
+# Attributes with the prices of every period, left out by the minimal profile.
+SERIES_ATTRIBUTES = ("today", "tomorrow", "raw_today", "raw_tomorrow")
+
 
 def _dry_setup(hass, config, add_devices, discovery_info=None):
     """Setup the damn platform using yaml."""
@@ -79,6 +100,7 @@ def _dry_setup(hass, config, add_devices, discovery_info=None):
     use_cents = config.get("price_in_cents")
     ad_template = config.get("additional_costs")
     period_type = config.get("period_type", DEFAULT_PERIOD_TYPE)
+    attributes = config.get("attributes", DEFAULT_ATTRIBUTES)
     api = hass.data[DOMAIN]
     sensor = NordpoolSensor(
         friendly_name,
@@ -93,6 +115,7 @@ def _dry_setup(hass, config, add_devices, discovery_info=None):
         ad_template,
         hass,
         period_type,
+        attributes,
     )
 
     add_devices([sensor])
@@ -110,12 +133,176 @@ async def async_setup_entry(hass, config_entry, async_add_devices):
     return True
 
 
+class PriceSnapshot:
+    """Priced values for today and tomorrow for one version of the data."""
+
+    __slots__ = (
+        "version",
+        "today",
+        "tomorrow",
+        "raw_today",
+        "raw_tomorrow",
+        "tomorrow_valid",
+        "starts",
+        "ends",
+        "values",
+        "cheapest_windows",
+        "most_expensive_windows",
+        "ranks",
+        "percentiles",
+        "quantiles",
+        "stats",
+        "prefix",
+        "_compact",
+    )
+
+    def __init__(self, version, raw_today, raw_tomorrow):
+        self.version = version
+        self.raw_today = raw_today
+        self.raw_tomorrow = raw_tomorrow
+        self.today = [i["value"] for i in raw_today]
+        self.tomorrow = [i["value"] for i in raw_tomorrow]
+
+        # Today and tomorrow as one series, for windows across midnight.
+        periods = raw_today + raw_tomorrow
+        self.starts = array("d", (i["start"].timestamp() for i in periods))
+        self.ends = array("d", (i["end"].timestamp() for i in periods))
+        self.values = array(
+            "d", (math.inf if i["value"] is None else i["value"] for i in periods)
+        )
+        self.prefix = PrefixSums(self.starts, self.ends, self.values)
+        self._compact = None
+        self.cheapest_windows = {}
+        self.most_expensive_windows = {}
+        for hours in WINDOW_HOURS:
+            for highest, result in (
+                (False, self.cheapest_windows),
+                (True, self.most_expensive_windows),
+            ):
+                window = self.window(hours * 3600, highest)
+                if window is not None:
+                    result[f"{hours}h"] = window
+
+        # Sorted once, aligned to today's periods for O(1) lookups.
+        self.ranks, self.percentiles, ordered = ranks(self.values[: len(raw_today)])
+        self.quantiles = quantiles(ordered)
+        self.stats = day_stats(
+            [i["start"] for i in raw_today], self.today, ordered=ordered
+        )
+
+        # Auto-detect expected count based on data length
+        # For hourly: expect 23+ values (accounting for DST)
+        # For 15min: expect 92+ values (96 - 4 for DST tolerance)
+        valid_count = len([i for i in self.tomorrow if i not in (None, float("inf"))])
+        if len(self.tomorrow) >= 90:  # Looks like 15min data
+            self.tomorrow_valid = valid_count >= 92
+        else:  # Looks like hourly data
+            self.tomorrow_valid = valid_count >= 23
+
+    def _range(self, start=None, end=None) -> tuple:
+        """Index of the first period starting at or after start, and of the
+        first period ending after end."""
+        first = 0 if start is None else bisect_left(self.starts, start)
+        last = len(self.ends) if end is None else bisect_right(self.ends, end)
+        return first, max(first, last)
+
+    def compact(self) -> tuple:
+        """raw_today and raw_tomorrow as a start epoch, step and values, see
+        PriceSeries.to_dict. Missing prices are None."""
+        if self._compact is None:
+            today = len(self.raw_today)
+            self._compact = tuple(
+                self._encode(first, last)
+                for first, last in ((0, today), (today, len(self.values)))
+            )
+        return self._compact
+
+    def _encode(self, first, last) -> dict:
+        data = PriceSeries.from_periods(
+            zip(self.starts[first:last], self.ends[first:last], self.values[first:last])
+        ).to_dict()
+        data["values"] = [i if math.isfinite(i) else None for i in data["values"]]
+        return data
+
+    def average(self, start, end) -> tuple:
+        """Average price over [start, end) (epoch) and the seconds of it that
+        had a price, see PrefixSums.average."""
+        return self.prefix.average(start, end)
+
+    def window(self, duration, highest=False, start=None, end=None):
+        """The cheapest, or most expensive, window of at least duration
+        seconds within start and end (epoch), as a dict with start, end and
+        average."""
+        first, last = self._range(start, end)
+        best = best_window(
+            self.starts[first:last],
+            self.ends[first:last],
+            self.values[first:last],
+            duration,
+            highest,
+        )
+        if best is None:
+            return None
+        return {
+            "start": dt_utils.as_local(
+                dt_utils.utc_from_timestamp(self.starts[first + best[0]])
+            ),
+            "end": dt_utils.as_local(
+                dt_utils.utc_from_timestamp(self.ends[first + best[1]])
+            ),
+            "average": best[2],
+        }
+
+    def select(self, count, min_run=1, highest=False, start=None, end=None):
+        """The count cheapest, or most expensive, periods within start and
+        end (epoch), see cheapest_periods."""
+        first, last = self._range(start, end)
+        return [
+            {
+                "start": self.starts[first + i],
+                "end": self.ends[first + i],
+                "value": self.values[first + i],
+            }
+            for i in cheapest_periods(
+                self.starts[first:last],
+                self.ends[first:last],
+                self.values[first:last],
+                count,
+                min_run,
+                highest,
+            )
+        ]
+
+    def rolling(self, duration, start=None, end=None) -> list:
+        """Min and max price of every window of at least duration seconds."""
+        first, last = self._range(start, end)
+        starts = self.starts[first:last]
+        ends = self.ends[first:last]
+        return [
+            {"start": starts[i], "end": ends[j], "min": low, "max": high}
+            for i, j, low, high in rolling_extremes(
+                starts, ends, self.values[first:last], duration
+            )
+        ]
+
+
 class NordpoolSensor(SensorEntity):
     "Sensors data"
 
     _attr_device_class = SensorDeviceClass.MONETARY
     _attr_suggested_display_precision = None
     _attr_state_class = SensorStateClass.TOTAL
+    # Kept out of the recorder, they are large and change with the data
+    # rather than with the state.
+    _unrecorded_attributes = frozenset(
+        (
+            *SERIES_ATTRIBUTES,
+            "quantiles",
+            "cheapest_windows",
+            "most_expensive_windows",
+            "next_averages",
+        )
+    )
 
     def __init__(
         self,
@@ -131,6 +318,7 @@ class NordpoolSensor(SensorEntity):
         ad_template,
         hass,
         period_type=DEFAULT_PERIOD_TYPE,
+        attributes=DEFAULT_ATTRIBUTES,
     ) -> None:
         self._area = area
         self._currency = currency or _REGIONS[area][0]
@@ -144,21 +332,49 @@ class NordpoolSensor(SensorEntity):
         self._ad_template = ad_template
         self._hass = hass
         self._period_type = period_type
+        self._attributes = attributes
         self._detected_period_type = None  # Will be auto-detected from API data
-        self._attr_force_update = True
 
         if vat is True:
             self._vat = _REGIONS[area][2]
         else:
             self._vat = 0
 
-        # Price by current hour.
+        # Price by current hour, and the index of that period today.
         self._current_price = None
+        self._current_index = None
 
         # Holds the data for today and morrow.
         self._data_today = SENTINEL
         self._data_tomorrow = SENTINEL
 
+        # Bumped every time the data for today or tomorrow is replaced,
+        # the priced snapshot is rebuilt when it no longer matches.
+        self._data_version = 0
+        self._snapshot = None
+        self._snapshot_hits = 0
+        self._snapshot_misses = 0
+
+        # Rendered additional costs keyed by (period start, spot value),
+        # evicted at midnight or when the template changes.
+        self._template_cache = {}
+        self._template_source = None
+        self._template_class = None
+        self._constant_costs = None
+        self._price_function = None
+        self._template_cache_hits = 0
+        self._template_cache_misses = 0
+
+        # Update requests merged into the pending update, and what the
+        # state was last written with.
+        self._update_task = None
+        self._update_requested = False
+        self._update_new_day = False
+        self._update_new_price = False
+        self._coalesced_updates = 0
+        self._written = None
+        self._skipped_writes = 0
+
         # Values for the day
         self._average = None
         self._max = None
@@ -181,6 +397,8 @@ class NordpoolSensor(SensorEntity):
             if self._ad_template.template in ("", None):
                 self._ad_template = cv.template(DEFAULT_TEMPLATE)
 
+        self._classify_template()
+
         # To control the updates.
         self._last_tick = None
 
@@ -257,14 +475,8 @@ class NordpoolSensor(SensorEntity):
             else None
         )
 
-    def _calc_price(self, value=None, fake_dt=None) -> float:
-        """Calculate price based on the users settings."""
-        if value is None:
-            value = self._current_price
-
-        if value is None or math.isinf(value):
-            # _LOGGER.debug("api returned junk infinty %s", value)
-            return None
+    def _render_additional_costs(self, price, fake_dt=None) -> float:
+        """Render the additional_costs template for a price."""
 
         def faker():
             def inner(*_, **__):
@@ -272,7 +484,6 @@ class NordpoolSensor(SensorEntity):
 
             return pass_context(inner)
 
-        price = value / _PRICE_IN[self._price_type] * (float(1 + self._vat))
         template_value = self._ad_template.async_render(
             now=faker(), current_price=price
         )
@@ -290,6 +501,72 @@ class NordpoolSensor(SensorEntity):
                 )
                 raise
 
+        return template_value
+
+    def _classify_template(self) -> None:
+        """Pick how the additional_costs template is evaluated."""
+        self._template_source = self._ad_template.template
+        self._template_class = classify_template(self._template_source)
+        self._constant_costs = None
+        self._price_function = None
+        self._clear_template_cache()
+        _LOGGER.debug(
+            "Template %s classified as %s", self._template_source, self._template_class
+        )
+
+    def _additional_costs(self, value, price, fake_dt=None) -> float:
+        """Additional costs for a price, using the cheapest way the template allows."""
+        if self._template_source != self._ad_template.template:
+            self._classify_template()
+
+        if self._template_class == TEMPLATE_CONSTANT:
+            if self._constant_costs is None:
+                self._constant_costs = self._render_additional_costs(price)
+            return self._constant_costs
+
+        if self._template_class == TEMPLATE_PRICE:
+            if self._price_function is None:
+                self._price_function = compile_price_function(
+                    self._template_source, self._render_additional_costs
+                )
+                if self._price_function is None:
+                    self._price_function = self._render_additional_costs
+            return self._price_function(price)
+
+        if fake_dt is None:
+            return self._render_additional_costs(price)
+        return self._cached_additional_costs(value, price, fake_dt)
+
+    def _cached_additional_costs(self, value, price, start) -> float:
+        """Additional costs for a period, rendered once per (start, value)."""
+        key = (start, value)
+        try:
+            template_value = self._template_cache[key]
+        except KeyError:
+            self._template_cache_misses += 1
+            template_value = self._render_additional_costs(price, fake_dt=start)
+            self._template_cache[key] = template_value
+        else:
+            self._template_cache_hits += 1
+
+        return template_value
+
+    def _clear_template_cache(self) -> None:
+        """Evict the rendered additional costs."""
+        self._template_cache.clear()
+
+    def _calc_price(self, value=None, fake_dt=None) -> float:
+        """Calculate price based on the users settings."""
+        if value is None:
+            value = self._current_price
+
+        if value is None or math.isinf(value):
+            # _LOGGER.debug("api returned junk infinty %s", value)
+            return None
+
+        price = value / _PRICE_IN[self._price_type] * (float(1 + self._vat))
+        template_value = self._additional_costs(value, price, fake_dt)
+
         self._additional_costs_value = template_value
         try:
             price += template_value
@@ -312,33 +589,22 @@ class NordpoolSensor(SensorEntity):
 
     def _update(self):
         """Set attrs"""
-        today = self.today
+        stats = self.snapshot.stats
 
-        if not today:
+        if stats is None:
             _LOGGER.debug("No data for today, unable to set attrs")
             return
 
-        self._average = mean(today)
-        self._min = min(today)
-        self._max = max(today)
-        self._mean = median(today)
-
-        # Auto-detect period type from data length
-        # 24 periods = hourly, 96 periods = 15min
-        periods_per_hour = len(today) // 24 if len(today) >= 24 else 1
+        self._average = stats["average"]
+        self._min = stats["min"]
+        self._max = stats["max"]
+        self._mean = stats["median"]
 
-        # Calculate indices based on detected period type
-        # Off-peak 1: hours 0-8, Peak: hours 8-20, Off-peak 2: hours 20-24
-        offpeak1_end = 8 * periods_per_hour
-        peak_end = 20 * periods_per_hour
-
-        offpeak1_data = today[0:offpeak1_end]
-        peak_data = today[offpeak1_end:peak_end]
-        offpeak2_data = today[peak_end:]
-
-        self._off_peak_1 = mean(offpeak1_data) if offpeak1_data else None
-        self._peak = mean(peak_data) if peak_data else None
-        self._off_peak_2 = mean(offpeak2_data) if offpeak2_data else None
+        # Off-peak 1: hours 0-8, Peak: hours 8-20, Off-peak 2: hours 20-24,
+        # by the local time of the periods so DST days are split right.
+        self._off_peak_1 = stats["off_peak_1"]
+        self._peak = stats["peak"]
+        self._off_peak_2 = stats["off_peak_2"]
 
     @property
     def current_price(self) -> float:
@@ -348,24 +614,44 @@ class NordpoolSensor(SensorEntity):
         return res
 
     def _someday(self, data) -> list:
-        """The data is already sorted in the xml,
-        but I don't trust that to continue forever. That's why we sort it ourselves."""
+        """The periods of a day in local time, sorted by start."""
         if data is None or data is SENTINEL:
             return []
 
-        local_times = []
-        for item in data.get("values", []):
-            i = {
-                "start": dt_utils.as_local(item["start"]),
-                "end": dt_utils.as_local(item["end"]),
-                "value": item["value"],
-            }
+        values = data.get("values")
+        if not values:
+            return []
 
-            local_times.append(i)
+        return values.as_dicts()
 
-        data["values"] = local_times
+    @property
+    def snapshot(self) -> PriceSnapshot:
+        """Priced values for the current data, rebuilt when the data changes."""
+        if self._snapshot is not None and self._snapshot.version == self._data_version:
+            self._snapshot_hits += 1
+            return self._snapshot
+
+        self._snapshot_misses += 1
+        self._snapshot = PriceSnapshot(
+            self._data_version,
+            self._add_raw(self._data_today),
+            self._add_raw(self._data_tomorrow),
+        )
+        return self._snapshot
+
+    @property
+    def snapshot_stats(self) -> dict:
+        """Hit and miss counters of the priced snapshot."""
+        total = self._snapshot_hits + self._snapshot_misses
+        return {
+            "hits": self._snapshot_hits,
+            "misses": self._snapshot_misses,
+            "hit_rate": self._snapshot_hits / total if total else None,
+        }
 
-        return sorted(data.get("values", []), key=itemgetter("start"))
+    def _bump_data_version(self) -> None:
+        """Invalidate the priced snapshot."""
+        self._data_version += 1
 
     @property
     def today(self) -> list:
@@ -374,11 +660,7 @@ class NordpoolSensor(SensorEntity):
         Returns:
             list: sorted list where today[0] is the price of hour 00.00 - 01.00
         """
-        return [
-            self._calc_price(i["value"], fake_dt=i["start"])
-            for i in self._someday(self._data_today)
-            if i
-        ]
+        return self.snapshot.today
 
     @property
     def tomorrow(self) -> list:
@@ -387,15 +669,11 @@ class NordpoolSensor(SensorEntity):
         Returns:
             list: sorted where tomorrow[0] is the price of hour 00.00 - 01.00 etc.
         """
-        return [
-            self._calc_price(i["value"], fake_dt=i["start"])
-            for i in self._someday(self._data_tomorrow)
-            if i
-        ]
+        return self.snapshot.tomorrow
 
     @property
     def extra_state_attributes(self) -> dict:
-        return {
+        attrs = {
             "average": self._average,
             "off_peak_1": self._off_peak_1,
             "off_peak_2": self._off_peak_2,
@@ -418,8 +696,57 @@ class NordpoolSensor(SensorEntity):
             "additional_costs_current_hour": self.additional_costs,
             "price_in_cents": self._use_cents,
             "period_type": self._detected_period_type or self._period_type,
+            "current_rank": self.current_rank,
+            "current_percentile": self.current_percentile,
+            "quantiles": self.snapshot.quantiles,
+            "cheapest_windows": self.snapshot.cheapest_windows,
+            "most_expensive_windows": self.snapshot.most_expensive_windows,
+            "next_averages": self.next_averages,
         }
 
+        if self._attributes == ATTRIBUTES_COMPACT:
+            attrs["raw_today"], attrs["raw_tomorrow"] = self.snapshot.compact()
+        elif self._attributes == ATTRIBUTES_MINIMAL:
+            for key in SERIES_ATTRIBUTES:
+                del attrs[key]
+        return attrs
+
+    @property
+    def next_averages(self) -> dict:
+        """Average price from the start of the current period over the next
+        WINDOW_HOURS hours, for the hours that have prices.
+
+        Anchored to the period rather than to now, so it only changes with
+        the current period and the state isn't written on every tick.
+        """
+        snapshot = self.snapshot
+        index = self._current_index
+        if index is None or index >= len(snapshot.starts):
+            return {}
+        start = snapshot.starts[index]
+        result = {}
+        for hours in WINDOW_HOURS:
+            average, _ = snapshot.average(start, start + hours * 3600)
+            if average is not None:
+                result[f"{hours}h"] = average
+        return result
+
+    @property
+    def current_rank(self):
+        """Rank of the current period among today's periods, 1 is the cheapest."""
+        ranks = self.snapshot.ranks
+        if self._current_index is None or self._current_index >= len(ranks):
+            return None
+        return ranks[self._current_index]
+
+    @property
+    def current_percentile(self):
+        """Percent of today's periods that are cheaper than the current one."""
+        percentiles = self.snapshot.percentiles
+        if self._current_index is None or self._current_index >= len(percentiles):
+            return None
+        return percentiles[self._current_index]
+
     def _add_raw(self, data) -> list:
         """Helper"""
         result = []
@@ -435,40 +762,28 @@ class NordpoolSensor(SensorEntity):
     @property
     def raw_today(self) -> list:
         """Raw today"""
-        return self._add_raw(self._data_today)
+        return self.snapshot.raw_today
 
     @property
     def raw_tomorrow(self) -> list:
         """Raw tomorrow"""
-        return self._add_raw(self._data_tomorrow)
+        return self.snapshot.raw_tomorrow
 
     @property
     def tomorrow_valid(self) -> bool:
         """Verify that we have the values for tomorrow."""
-        # Auto-detect expected count based on data length
-        # For hourly: expect 23+ values (accounting for DST)
-        # For 15min: expect 92+ values (96 - 4 for DST tolerance)
-        tomorrow_data = self.tomorrow
-        valid_count = len([i for i in tomorrow_data if i not in (None, float("inf"))])
-
-        # Determine expected minimum based on data length
-        if len(tomorrow_data) >= 90:  # Looks like 15min data
-            return valid_count >= 92
-        else:  # Looks like hourly data
-            return valid_count >= 23
+        return self.snapshot.tomorrow_valid
 
     async def _update_current_price(self) -> None:
         """update the current price (price this period)"""
-        local_now = dt_utils.now()
+        now = dt_utils.utcnow().timestamp()
 
         data = await self._api.today(self._area, self._currency)
-        if data:
-            someday_data = self._someday(data)
-
-            # Auto-detect period type from first data entry if available
-            if someday_data and self._detected_period_type is None:
-                first_entry = someday_data[0]
-                period_length = (first_entry["end"] - first_entry["start"]).total_seconds() / 60
+        series = data.get("values") if data else None
+        if series:
+            # Auto-detect period type from the step of the data
+            if self._detected_period_type is None:
+                period_length = series.step / 60
 
                 if period_length <= 15:
                     self._detected_period_type = PERIOD_15MIN
@@ -480,30 +795,76 @@ class NordpoolSensor(SensorEntity):
             # Use detected period type or fall back to configured
             period_type = self._detected_period_type or self._period_type
 
-            for item in someday_data:
-                if item["start"] == start_of(local_now, period_type):
-                    self._current_price = item["value"]
-                    _LOGGER.debug(
-                        "Updated %s _current_price %s (period: %s)",
-                        self.name, item["value"], period_type
-                    )
-                    break
+            index = series.index_at(now)
+            self._current_index = index
+            if index is not None:
+                self._current_price = series.values[index]
+                _LOGGER.debug(
+                    "Updated %s _current_price %s (period: %s)",
+                    self.name,
+                    self._current_price,
+                    period_type,
+                )
         else:
             _LOGGER.debug("Cant update _update_current_price because it was no data")
 
     async def handle_new_day(self):
         """Update attrs for the new day"""
         _LOGGER.debug("handle_new_day")
-        self._data_tomorrow = None
-        # update attrs for the new day
-        await self.handle_new_hr()
+        await self._request_update(new_day=True)
 
     async def handle_new_hr(self):
         """Update attrs for the new hour"""
         _LOGGER.debug("handle_new_hr")
+        await self._request_update()
+
+    async def handle_new_price(self):
+        """Update atts because of the new prices"""
+        _LOGGER.debug("handle_new_price")
+        await self._request_update(new_price=True)
+
+    async def _request_update(self, new_day=False, new_price=False) -> None:
+        """Update the sensor, once for all the requests made while an update
+        is pending.
+
+        The midnight and period events fire together and a refresh also sends
+        a period event, the requests are merged into the update that hasn't
+        started yet, or into one more pass of the update that is running.
+        """
+        self._update_new_day |= new_day
+        self._update_new_price |= new_price
+        self._update_requested = True
+        # The task can finish before create_task returns when it starts
+        # eagerly, so a finished task is the same as none.
+        if self._update_task is None or self._update_task.done():
+            self._update_task = self._hass.async_create_task(self._run_updates())
+        else:
+            self._coalesced_updates += 1
+        await asyncio.shield(self._update_task)
+
+    async def _run_updates(self) -> None:
+        while self._update_requested:
+            self._update_requested = False
+            new_day, self._update_new_day = self._update_new_day, False
+            new_price, self._update_new_price = self._update_new_price, False
+            await self._async_update(new_day, new_price)
+
+    async def _async_update(self, new_day, new_price) -> None:
+        if new_day:
+            self._data_tomorrow = None
+            self._clear_template_cache()
+            self._bump_data_version()
+
+        if new_price:
+            tomorrow = await self._api.tomorrow(self._area, self._currency)
+            if tomorrow and tomorrow is not self._data_tomorrow:
+                self._data_tomorrow = tomorrow
+                self._bump_data_version()
+
         today = await self._api.today(self._area, self._currency)
-        if today:
+        if today and today is not self._data_today:
             self._data_today = today
+            self._bump_data_version()
 
         now = dt_utils.now()
         if self._data_tomorrow is SENTINEL and stock(now) >= stock(now).replace(
@@ -512,22 +873,47 @@ class NordpoolSensor(SensorEntity):
             tomorrow = await self._api.tomorrow(self._area, self._currency)
             if tomorrow:
                 self._data_tomorrow = tomorrow
+                self._bump_data_version()
+
+        # Templates that read states etc. can change between periods.
+        if self._template_class == TEMPLATE_DYNAMIC:
+            self._clear_template_cache()
+            self._bump_data_version()
 
         self._update()
         # Updates the current for this hour.
         await self._update_current_price()
         # This is not to make sure the correct template costs are set. Issue 258
         self._attr_native_value = self.current_price
-        self.async_write_ha_state()
 
-    async def handle_new_price(self):
-        """Update atts because of the new prices"""
-        _LOGGER.debug("handle_new_price")
-        tomorrow = await self._api.tomorrow(self._area, self._currency)
-        if tomorrow:
-            self._data_tomorrow = tomorrow
+        # The attributes only change with the data and the current period.
+        written = (
+            self._attr_native_value,
+            self._data_version,
+            self._current_index,
+            self._detected_period_type,
+        )
+        if written == self._written:
+            self._skipped_writes += 1
+        else:
+            self._written = written
+            self.async_write_ha_state()
+        _LOGGER.debug(
+            "Snapshot stats for %s %s, template cache hits %s misses %s, %s",
+            self.name,
+            self.snapshot_stats,
+            self._template_cache_hits,
+            self._template_cache_misses,
+            self.update_stats,
+        )
 
-        await self.handle_new_hr()
+    @property
+    def update_stats(self) -> dict:
+        """Counters of merged update requests and of skipped state writes."""
+        return {
+            "coalesced": self._coalesced_updates,
+            "skipped_writes": self._skipped_writes,
+        }
 
     async def async_added_to_hass(self):
         """Connect to dispatcher listening for entity data notifications."""
@@ -539,4 +925,10 @@ class NordpoolSensor(SensorEntity):
             self._api._hass, EVENT_NEW_PRICE, self.handle_new_price
         )
         async_dispatcher_connect(self._api._hass, EVENT_NEW_HOUR, self.handle_new_hr)
+        self._api.sensors[self.entity_id] = self
         await self.handle_new_hr()
+
+    async def async_will_remove_from_hass(self):
+        """Remove the sensor from the api's registry."""
+        await super().async_will_remove_from_hass()
+        self._api.sensors.pop(self.entity_id, None)
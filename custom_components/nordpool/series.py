@@ -0,0 +1,187 @@
+"""Compact storage of prices for consecutive periods."""
+
+import math
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from operator import itemgetter
+
+from homeassistant.util import dt as dt_utils
+
+__all__ = ["PriceSeries"]
+
+
+class PriceSeries:
+    """Prices for consecutive periods.
+
+    The periods are stored as the epoch of the first start, a fixed step
+    in seconds (900 or 3600) and an array of values. Periods that are not
+    on that grid, like gaps or periods with another length, are kept in a
+    list of exceptions as (index, start, end). The periods after an
+    exception continue from its end.
+    """
+
+    __slots__ = ("start", "step", "values", "exceptions", "_starts")
+
+    def __init__(self, start=None, step=None, values=None, exceptions=None):
+        self.start = start
+        self.step = step
+        self.values = values if values is not None else array("d")
+        self.exceptions = exceptions if exceptions is not None else []
+        # Start of every period, only built for series with exceptions.
+        self._starts = None
+
+    @classmethod
+    def from_periods(cls, periods, step=None):
+        """Build a series from (start, end, value) tuples, times in epoch seconds."""
+        series = cls(step=step)
+        for start, end, value in sorted(periods, key=itemgetter(0)):
+            series.append(start, end, value)
+        return series
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __bool__(self) -> bool:
+        return len(self.values) > 0
+
+    def __iter__(self):
+        """Yield (start, end, value) for every period."""
+        if not self.exceptions:
+            start, step = self.start, self.step
+            for i, value in enumerate(self.values):
+                period_start = start + i * step
+                yield period_start, period_start + step, value
+            return
+
+        for i, value in enumerate(self.values):
+            yield (*self.bounds(i), value)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PriceSeries):
+            return NotImplemented
+        return list(self) == list(other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return "PriceSeries(start=%s, step=%s, periods=%s, exceptions=%s)" % (
+            self.start,
+            self.step,
+            len(self.values),
+            len(self.exceptions),
+        )
+
+    @property
+    def end(self):
+        """End of the last period."""
+        if not self.values:
+            return None
+        return self.bounds(len(self.values) - 1)[1]
+
+    def bounds(self, index) -> tuple:
+        """Start and end of the period at index."""
+        if self.exceptions:
+            pos = bisect_right(self.exceptions, (index, math.inf)) - 1
+            if pos >= 0:
+                exc_index, exc_start, exc_end = self.exceptions[pos]
+                if exc_index == index:
+                    return exc_start, exc_end
+                start = exc_end + (index - exc_index - 1) * self.step
+                return start, start + self.step
+
+        start = self.start + index * self.step
+        return start, start + self.step
+
+    def append(self, start, end, value) -> None:
+        """Add a period after the last one."""
+        if not self.values:
+            self.start = start
+            if self.step is None:
+                self.step = end - start
+            if end - start != self.step:
+                self.exceptions.append((0, start, end))
+        elif start != self.end or end - start != self.step:
+            self.exceptions.append((len(self.values), start, end))
+        self.values.append(value)
+        self._starts = None
+
+    def index_at(self, timestamp):
+        """Index of the period that contains timestamp, None if there is none.
+
+        Regular series are looked up by offset, series with exceptions by a
+        binary search over the period starts.
+        """
+        if not self.values:
+            return None
+
+        if not self.exceptions:
+            index = int((timestamp - self.start) // self.step)
+            return index if 0 <= index < len(self.values) else None
+
+        if self._starts is None:
+            self._starts = array("d", (start for start, _, _ in self))
+        index = bisect_right(self._starts, timestamp) - 1
+        if index >= 0 and timestamp < self.bounds(index)[1]:
+            return index
+        return None
+
+    def extend(self, other) -> None:
+        """Add all the periods of another series."""
+        if not other:
+            return
+
+        # Regular series that continue the grid are just concatenated.
+        if not other.exceptions and not self.values:
+            self.start, self.step = other.start, other.step
+            self.values.extend(other.values)
+            self._starts = None
+            return
+        if not other.exceptions and other.step == self.step and other.start == self.end:
+            self.values.extend(other.values)
+            self._starts = None
+            return
+
+        for start, end, value in other:
+            self.append(start, end, value)
+
+    def between(self, start, end) -> "PriceSeries":
+        """Periods that start in [start, end)."""
+        if not self.exceptions and self.values:
+            first = max(0, math.ceil((start - self.start) / self.step))
+            last = min(len(self.values), math.ceil((end - self.start) / self.step))
+            return PriceSeries(
+                self.start + first * self.step,
+                self.step,
+                self.values[first : max(first, last)],
+            )
+
+        series = PriceSeries(step=self.step)
+        for period_start, period_end, value in self:
+            if start <= period_start < end:
+                series.append(period_start, period_end, value)
+        return series
+
+    def to_dict(self) -> dict:
+        """The series as plain values, exceptions are only included if any."""
+        data = {
+            "start": self.start,
+            "step": self.step,
+            "values": self.values.tolist(),
+        }
+        if self.exceptions:
+            data["exceptions"] = [list(i) for i in self.exceptions]
+        return data
+
+    def as_dicts(self, tz=None) -> list:
+        """The periods as dicts with start, end and value, in local time by default."""
+        if tz is None:
+            tz = dt_utils.DEFAULT_TIME_ZONE
+        return [
+            {
+                "start": datetime.fromtimestamp(start, tz),
+                "end": datetime.fromtimestamp(end, tz),
+                "value": value,
+            }
+            for start, end, value in self
+        ]
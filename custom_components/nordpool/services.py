@@ -6,12 +6,14 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import homeassistant.helpers.config_validation as cv
 from homeassistant.util import dt as dt_util
 
-from .const import _REGIONS
-
+from .cache import ResponseCache
+from .const import DOMAIN, PRIORITY_SERVICE, SERVICE_CACHE_TTL, _REGIONS
+from .misc import stockholm_tz
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -48,12 +50,145 @@ YEAR_SCHEMA = vol.Schema(
 )
 
 
+# Longest range the range service returns.
+MAX_RANGE_DAYS = 366
+
+
+def _check_range(value):
+    if value["end_date"] < value["start_date"]:
+        raise vol.Invalid("end_date must not be before start_date")
+    if (value["end_date"] - value["start_date"]).days >= MAX_RANGE_DAYS:
+        raise vol.Invalid(f"The range can't be longer than {MAX_RANGE_DAYS} days")
+    return value
+
+
+RANGE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required("currency"): str,
+            vol.Required("start_date"): cv.date,
+            vol.Required("end_date"): cv.date,
+            vol.Required("area"): check_setting(cv.ensure_list),
+        }
+    ),
+    _check_range,
+)
+
+
+# Length of a window in hours, at least one 15 minute period.
+WINDOW_HOURS_SCHEMA = vol.All(vol.Coerce(float), vol.Range(min=0.25, max=48))
+
+
+WINDOW_SCHEMA = vol.Schema(
+    {
+        vol.Required("entity_id"): cv.entity_id,
+        vol.Required("hours"): WINDOW_HOURS_SCHEMA,
+        vol.Optional("highest", default=False): cv.boolean,
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+    }
+)
+
+
+ROLLING_SCHEMA = vol.Schema(
+    {
+        vol.Required("entity_id"): cv.entity_id,
+        vol.Required("hours"): WINDOW_HOURS_SCHEMA,
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+    }
+)
+
+
+# Most periods a sensor has, today and tomorrow with 15 minute periods.
+MAX_PERIODS = 2 * 25 * 4
+
+
+PERIODS_SCHEMA = vol.Schema(
+    {
+        vol.Required("entity_id"): cv.entity_id,
+        vol.Required("count"): vol.All(cv.positive_int, vol.Range(max=MAX_PERIODS)),
+        vol.Optional("min_run", default=1): vol.All(
+            cv.positive_int, vol.Range(max=MAX_PERIODS)
+        ),
+        vol.Optional("highest", default=False): cv.boolean,
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+    }
+)
+
+
+def _check_average(value):
+    if ("end" in value) == ("hours" in value):
+        raise vol.Invalid("Give either end or hours")
+    return value
+
+
+AVERAGE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required("entity_id"): cv.entity_id,
+            vol.Optional("start"): cv.datetime,
+            vol.Optional("end"): cv.datetime,
+            vol.Optional("hours"): WINDOW_HOURS_SCHEMA,
+        }
+    ),
+    _check_average,
+)
+
+
+def _sensor(hass, entity_id):
+    """The Nord Pool sensor with entity_id."""
+    api = hass.data.get(DOMAIN)
+    sensor = api.sensors.get(entity_id) if api is not None else None
+    if sensor is None:
+        raise ServiceValidationError(f"{entity_id} is not a Nord Pool sensor")
+    return sensor
+
+
+def _timestamp(value):
+    """Epoch of a datetime from a service call, naive ones are local time."""
+    return None if value is None else dt_util.as_utc(value).timestamp()
+
+
+def _isoformat(timestamp) -> str:
+    return dt_util.as_local(dt_util.utc_from_timestamp(timestamp)).isoformat()
+
+
+def _areas_key(areas) -> tuple:
+    return tuple(sorted(areas))
+
+
+def _date_ttl(day):
+    """Past delivery dates can't change and are kept, others expire."""
+    if day < dt_util.now().astimezone(stockholm_tz).date():
+        return None
+    return SERVICE_CACHE_TTL
+
+
+def _year_ttl(year):
+    """Past years can't change and are kept, the current one expires."""
+    if int(year) < dt_util.now().astimezone(stockholm_tz).year:
+        return None
+    return SERVICE_CACHE_TTL
+
+
 async def async_setup_services(hass: HomeAssistant):
     _LOGGER.debug("Setting up services")
     from .aio_price import AioPrices
 
     client = async_get_clientsession(hass)
 
+    def prices(currency):
+        # Service calls wait behind the sensor refreshes in the rate limiter.
+        return AioPrices(currency, client, priority=PRIORITY_SERVICE)
+
+    # Responses keyed by (service, currency, areas, date or year).
+    responses = ResponseCache()
+    # Parsed delivery dates of the range service, keyed by (currency, areas,
+    # date), room for two of the longest ranges.
+    range_days = ResponseCache(max_entries=2 * MAX_RANGE_DAYS)
+
     async def hourly(service_call: ServiceCall) -> Any:
         sc = service_call.data
         _LOGGER.debug("called hourly with %r", sc)
@@ -63,8 +198,12 @@ async def async_setup_services(hass: HomeAssistant):
             year=sc["date"].year, month=sc["date"].month, day=sc["date"].day
         )
 
-        value = await AioPrices(sc["currency"], client).hourly(
-            areas=sc["area"], end_date=end_date, raw=True
+        value = await responses.get_or_fetch(
+            ("hourly", sc["currency"], _areas_key(sc["area"]), sc["date"]),
+            lambda: prices(sc["currency"]).hourly(
+                areas=sc["area"], end_date=end_date, raw=True
+            ),
+            _date_ttl(sc["date"]),
         )
 
         _LOGGER.debug("Got value %r", value)
@@ -74,8 +213,12 @@ async def async_setup_services(hass: HomeAssistant):
         sc = service_call.data
         _LOGGER.debug("called yearly with %r", sc)
 
-        value = await AioPrices(sc["currency"], client).yearly(
-            areas=sc["area"], end_date=sc["year"]
+        value = await responses.get_or_fetch(
+            ("yearly", sc["currency"], _areas_key(sc["area"]), sc["year"]),
+            lambda: prices(sc["currency"]).yearly(
+                areas=sc["area"], end_date=sc["year"]
+            ),
+            _year_ttl(sc["year"]),
         )
 
         _LOGGER.debug("Got value %r", value)
@@ -85,8 +228,12 @@ async def async_setup_services(hass: HomeAssistant):
         sc = service_call.data
         _LOGGER.debug("called weekly with %r", sc)
 
-        value = await AioPrices(sc["currency"], client).yearly(
-            areas=sc["area"], end_date=sc["year"]
+        value = await responses.get_or_fetch(
+            ("weekly", sc["currency"], _areas_key(sc["area"]), sc["year"]),
+            lambda: prices(sc["currency"]).yearly(
+                areas=sc["area"], end_date=sc["year"]
+            ),
+            _year_ttl(sc["year"]),
         )
 
         _LOGGER.debug("Got value %r", value)
@@ -96,8 +243,12 @@ async def async_setup_services(hass: HomeAssistant):
         sc = service_call.data
         _LOGGER.debug("called monthly with %r", sc)
 
-        value = await AioPrices(sc["currency"], client).monthly(
-            areas=sc["area"], end_date=sc["year"]
+        value = await responses.get_or_fetch(
+            ("monthly", sc["currency"], _areas_key(sc["area"]), sc["year"]),
+            lambda: prices(sc["currency"]).monthly(
+                areas=sc["area"], end_date=sc["year"]
+            ),
+            _year_ttl(sc["year"]),
         )
         _LOGGER.debug("Got value %r", value)
         return value
@@ -106,12 +257,133 @@ async def async_setup_services(hass: HomeAssistant):
         sc = service_call.data
         _LOGGER.debug("called daily with %r", sc)
 
-        value = await AioPrices(sc["currency"], client).daily(
-            areas=sc["area"], end_date=sc["year"]
+        value = await responses.get_or_fetch(
+            ("daily", sc["currency"], _areas_key(sc["area"]), sc["year"]),
+            lambda: prices(sc["currency"]).daily(areas=sc["area"], end_date=sc["year"]),
+            _year_ttl(sc["year"]),
         )
         _LOGGER.debug("Got value %r", value)
         return value
 
+    async def price_range(service_call: ServiceCall):
+        sc = service_call.data
+        _LOGGER.debug("called range with %r", sc)
+
+        # Every delivery date as a compact series, see PriceSeries.to_dict
+        areas = {area: [] for area in sc["area"]}
+        async for day, data in prices(sc["currency"]).iter_days(
+            sc["start_date"],
+            sc["end_date"],
+            sc["area"],
+            cache=range_days,
+            ttl=_date_ttl,
+        ):
+            for area, values in data["areas"].items():
+                areas.setdefault(area, []).append(
+                    {"date": day.isoformat(), **values["values"].to_dict()}
+                )
+
+        return {
+            "currency": sc["currency"],
+            "start_date": sc["start_date"].isoformat(),
+            "end_date": sc["end_date"].isoformat(),
+            "areas": areas,
+        }
+
+    async def cheapest_window(service_call: ServiceCall):
+        sc = service_call.data
+        _LOGGER.debug("called cheapest_window with %r", sc)
+
+        window = _sensor(hass, sc["entity_id"]).snapshot.window(
+            round(sc["hours"] * 3600),
+            sc["highest"],
+            _timestamp(sc.get("start")),
+            _timestamp(sc.get("end")),
+        )
+        if window is None:
+            return {"window": None}
+        return {
+            "window": {
+                "start": window["start"].isoformat(),
+                "end": window["end"].isoformat(),
+                "average": window["average"],
+            }
+        }
+
+    async def rolling_min_max(service_call: ServiceCall):
+        sc = service_call.data
+        _LOGGER.debug("called rolling_min_max with %r", sc)
+
+        windows = _sensor(hass, sc["entity_id"]).snapshot.rolling(
+            round(sc["hours"] * 3600),
+            _timestamp(sc.get("start")),
+            _timestamp(sc.get("end")),
+        )
+        return {
+            "windows": [
+                {
+                    "start": _isoformat(i["start"]),
+                    "end": _isoformat(i["end"]),
+                    "min": i["min"],
+                    "max": i["max"],
+                }
+                for i in windows
+            ]
+        }
+
+    async def cheapest_periods(service_call: ServiceCall):
+        sc = service_call.data
+        _LOGGER.debug("called cheapest_periods with %r", sc)
+
+        args = (
+            sc["count"],
+            sc["min_run"],
+            sc["highest"],
+            _timestamp(sc.get("start")),
+            _timestamp(sc.get("end")),
+        )
+        snapshot = _sensor(hass, sc["entity_id"]).snapshot
+        if sc["min_run"] > 1:
+            # Can take tens of milliseconds for two days of 15 minute periods
+            periods = await hass.async_add_executor_job(snapshot.select, *args)
+        else:
+            periods = snapshot.select(*args)
+
+        return {
+            "periods": [
+                {
+                    "start": _isoformat(i["start"]),
+                    "end": _isoformat(i["end"]),
+                    "value": i["value"],
+                }
+                for i in periods
+            ],
+            "average": (
+                sum(i["value"] for i in periods) / len(periods) if periods else None
+            ),
+        }
+
+    async def average_price(service_call: ServiceCall):
+        sc = service_call.data
+        _LOGGER.debug("called average_price with %r", sc)
+
+        start = _timestamp(sc.get("start")) or dt_util.utcnow().timestamp()
+        if "end" in sc:
+            end = _timestamp(sc["end"])
+        else:
+            end = start + round(sc["hours"] * 3600)
+        if end <= start:
+            raise ServiceValidationError("end must be after start")
+
+        average, seconds = _sensor(hass, sc["entity_id"]).snapshot.average(start, end)
+        return {
+            "start": _isoformat(start),
+            "end": _isoformat(end),
+            "average": average,
+            # Share of the range that has prices.
+            "coverage": seconds / (end - start),
+        }
+
     hass.services.async_register(
         domain="nordpool",
         service="hourly",
@@ -147,3 +419,38 @@ async def async_setup_services(hass: HomeAssistant):
         schema=YEAR_SCHEMA,
         supports_response=SupportsResponse.OPTIONAL,
     )
+    hass.services.async_register(
+        domain="nordpool",
+        service="range",
+        service_func=price_range,
+        schema=RANGE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        domain="nordpool",
+        service="cheapest_window",
+        service_func=cheapest_window,
+        schema=WINDOW_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        domain="nordpool",
+        service="rolling_min_max",
+        service_func=rolling_min_max,
+        schema=ROLLING_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        domain="nordpool",
+        service="cheapest_periods",
+        service_func=cheapest_periods,
+        schema=PERIODS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        domain="nordpool",
+        service="average_price",
+        service_func=average_price,
+        schema=AVERAGE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,185 @@
+"""Statistics over the prices of a day."""
+
+import math
+from array import array
+from bisect import bisect_right
+
+__all__ = ["PrefixSums", "day_stats", "quantiles", "ranks"]
+
+# Quantile cut points, in percent, of the quantiles attribute.
+QUANTILES = (10, 25, 50, 75, 90)
+
+
+def day_stats(starts, values, ordered=None):
+    """Average, min, max, median and the peak and off-peak averages of a
+    day's prices, None if there are no prices.
+
+    One pass over the periods buckets them by the local hour they start in
+    (starts are local datetimes): off_peak_1 before 08:00, peak from 08:00
+    to 20:00 and off_peak_2 from 20:00, so 23 and 25 hour days are split
+    right. Values that aren't finite are left out. `ordered`, the sorted
+    finite values if they are at hand, saves sorting for the median.
+    """
+    sums = [0.0, 0.0, 0.0]
+    counts = [0, 0, 0]
+    low = math.inf
+    high = -math.inf
+    finite = [] if ordered is None else None
+
+    for start, value in zip(starts, values):
+        if value is None or not math.isfinite(value):
+            continue
+        hour = start.hour
+        bucket = 0 if hour < 8 else 1 if hour < 20 else 2
+        sums[bucket] += value
+        counts[bucket] += 1
+        if value < low:
+            low = value
+        if value > high:
+            high = value
+        if finite is not None:
+            finite.append(value)
+
+    total = sum(counts)
+    if not total:
+        return None
+
+    if ordered is None:
+        ordered = sorted(finite)
+    middle = total // 2
+    if total % 2:
+        median = ordered[middle]
+    else:
+        median = (ordered[middle - 1] + ordered[middle]) / 2
+
+    def average(bucket):
+        return sums[bucket] / counts[bucket] if counts[bucket] else None
+
+    return {
+        "average": sum(sums) / total,
+        "min": low,
+        "max": high,
+        "median": median,
+        "off_peak_1": average(0),
+        "peak": average(1),
+        "off_peak_2": average(2),
+    }
+
+
+def ranks(values) -> tuple:
+    """Rank and percentile of every value, and the sorted values.
+
+    The rank is 1 for the cheapest value and equal values share the lowest
+    rank. The percentile is the percent of the values that are cheaper.
+    Values that aren't finite get None and are left out of the sorted
+    values.
+    """
+    order = sorted(
+        (i for i in range(len(values)) if math.isfinite(values[i])),
+        key=values.__getitem__,
+    )
+    count = len(order)
+    rank_of = [None] * len(values)
+    percentile_of = [None] * len(values)
+
+    rank = 0
+    previous = None
+    for position, i in enumerate(order):
+        if position == 0 or values[i] != previous:
+            rank = position + 1
+            previous = values[i]
+        rank_of[i] = rank
+        percentile_of[i] = 100 * (rank - 1) / count
+
+    return rank_of, percentile_of, [values[i] for i in order]
+
+
+def quantiles(sorted_values, points=QUANTILES) -> dict:
+    """Cut points of sorted values, interpolated between the closest ranks."""
+    if not sorted_values:
+        return {}
+
+    last = len(sorted_values) - 1
+    result = {}
+    for point in points:
+        position = last * point / 100
+        low = math.floor(position)
+        high = min(low + 1, last)
+        result[f"p{point}"] = sorted_values[low] + (
+            sorted_values[high] - sorted_values[low]
+        ) * (position - low)
+    return result
+
+
+class PrefixSums:
+    """Running totals of price * seconds and of seconds with a price over a
+    series of periods, for the average price over any time range.
+
+    The totals up to a time are looked up by offset on a regular series and
+    by a binary search otherwise, a period that is only partly in the range
+    counts for the part that is. Gaps and values that aren't finite don't
+    count.
+    """
+
+    __slots__ = ("starts", "ends", "values", "_price", "_seconds", "_step")
+
+    def __init__(self, starts, ends, values):
+        self.starts = starts
+        self.ends = ends
+        self.values = values
+        # Totals before period i, so one longer than the periods.
+        self._price = array("d", [0.0])
+        self._seconds = array("d", [0.0])
+        for start, end, value in zip(starts, ends, values):
+            price = self._price[-1]
+            seconds = self._seconds[-1]
+            if math.isfinite(value):
+                price += value * (end - start)
+                seconds += end - start
+            self._price.append(price)
+            self._seconds.append(seconds)
+
+        self._step = None
+        if len(starts):
+            step = ends[0] - starts[0]
+            if all(
+                starts[i] == starts[0] + i * step and ends[i] - starts[i] == step
+                for i in range(len(starts))
+            ):
+                self._step = step
+
+    def totals(self, timestamp) -> tuple:
+        """Price * seconds and seconds with a price before timestamp."""
+        starts = self.starts
+        if not len(starts) or timestamp <= starts[0]:
+            return 0.0, 0.0
+        if timestamp >= self.ends[-1]:
+            return self._price[-1], self._seconds[-1]
+
+        if self._step is not None:
+            i = int((timestamp - starts[0]) // self._step)
+        else:
+            i = bisect_right(starts, timestamp) - 1
+
+        if timestamp >= self.ends[i]:
+            # In a gap after period i
+            return self._price[i + 1], self._seconds[i + 1]
+
+        price = self._price[i]
+        seconds = self._seconds[i]
+        value = self.values[i]
+        if math.isfinite(value):
+            part = timestamp - starts[i]
+            price += value * part
+            seconds += part
+        return price, seconds
+
+    def average(self, start, end) -> tuple:
+        """Average price over [start, end) and the seconds that had a price,
+        (None, 0) if none of it had."""
+        start_price, start_seconds = self.totals(start)
+        end_price, end_seconds = self.totals(end)
+        seconds = end_seconds - start_seconds
+        if seconds <= 0:
+            return None, 0.0
+        return (end_price - start_price) / seconds, seconds
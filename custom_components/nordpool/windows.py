@@ -0,0 +1,94 @@
+"""Windows of consecutive periods, like the cheapest three hours."""
+
+import math
+from collections import deque
+
+__all__ = ["best_window", "rolling_extremes", "windows"]
+
+
+def windows(starts, ends, values, duration):
+    """Yield (first, last, total, covered) for every run of consecutive
+    periods that lasts at least `duration` seconds, rounded up to whole
+    periods.
+
+    total is the sum of value * seconds of the periods and covered their
+    seconds, so total / covered is the average price of the window. Periods
+    are consecutive when one starts where the previous ended, a gap or a
+    value that isn't finite ends the run. Each period is added and removed
+    once, O(n).
+    """
+    n = len(starts)
+    last = 0
+    covered = 0.0
+    total = 0.0
+    for first in range(n):
+        if last <= first:
+            last = first
+            covered = 0.0
+            total = 0.0
+
+        while (
+            last < n
+            and covered < duration
+            and math.isfinite(values[last])
+            and (last == first or starts[last] == ends[last - 1])
+        ):
+            seconds = ends[last] - starts[last]
+            covered += seconds
+            total += values[last] * seconds
+            last += 1
+
+        if covered >= duration:
+            yield first, last - 1, total, covered
+
+        if last > first:
+            seconds = ends[first] - starts[first]
+            covered -= seconds
+            total -= values[first] * seconds
+
+
+def best_window(starts, ends, values, duration, highest=False):
+    """The (first, last, average) of the window of at least `duration`
+    seconds, see windows, with the lowest, or highest, average price. None
+    if there is no such window. The earliest window wins a tie.
+    """
+    best = None
+    for first, last, total, covered in windows(starts, ends, values, duration):
+        average = total / covered
+        if (
+            best is None
+            or (highest and average > best[2])
+            or (not highest and average < best[2])
+        ):
+            best = (first, last, average)
+    return best
+
+
+def rolling_extremes(starts, ends, values, duration):
+    """Yield (first, last, min, max) for every window of at least `duration`
+    seconds, see windows.
+
+    The min and max are kept in monotonic deques of indexes, so every index
+    is pushed and popped at most once, O(n) for all the windows.
+    """
+    lows = deque()
+    highs = deque()
+    pushed = 0
+    for first, last, _, _ in windows(starts, ends, values, duration):
+        # Indexes before a gap can't be in this window.
+        pushed = max(pushed, first)
+        while pushed <= last:
+            value = values[pushed]
+            while lows and values[lows[-1]] >= value:
+                lows.pop()
+            lows.append(pushed)
+            while highs and values[highs[-1]] <= value:
+                highs.pop()
+            highs.append(pushed)
+            pushed += 1
+
+        while lows[0] < first:
+            lows.popleft()
+        while highs[0] < first:
+            highs.popleft()
+        yield first, last, values[lows[0]], values[highs[0]]